@@ -30,7 +30,7 @@ except ImportError:
     ConversationMemory = None
     _has_memory = False
 
-from src.utils.response_formatter import ResponseFormatter
+from src.utils.response_formatter import get_formatter
 from src.utils.config import PAGE_TITLE, PAGE_LAYOUT, INITIAL_SIDEBAR_STATE, CSV_DATA_PATH
 from src.utils.input_loader import infer_table_name
 from src.graph import LangGraphAgent
@@ -442,18 +442,20 @@ with tab2:
                             enhanced_query = f"From the '{selected_source}' table: {user_query}"
                         
                         if "LangGraph" in agent_type:
-                            # Use LangGraph agent
-                            agent = LangGraphAgent(
-                                st.session_state.processor,
-                                st.session_state.conversation_memory
-                            )
+                            # Use LangGraph agent (kept for the session so its LLM cache survives between messages)
+                            if "langgraph_agent" not in st.session_state:
+                                st.session_state.langgraph_agent = LangGraphAgent(
+                                    st.session_state.processor,
+                                    st.session_state.conversation_memory
+                                )
+                            agent = st.session_state.langgraph_agent
                             result = agent.process_query(enhanced_query)
                         else:
                             # Use Multi-Agent orchestrator
                             orchestrator = MultiAgentOrchestrator(
                                 st.session_state.processor,
                                 st.session_state.conversation_memory,
-                                ResponseFormatter(st.session_state.processor)
+                                get_formatter(st.session_state.processor)
                             )
                             result = orchestrator.process_query(enhanced_query)
                         
@@ -10,6 +10,7 @@ from langchain_core.tools import tool
 import json
 from ..utils.data_processor import get_processor
 from ..utils.llm_config import get_llm
+from ..utils.config import QUERY_BATCH_CONCURRENCY
 
 # Optional import - requires faiss
 try:
@@ -18,9 +19,11 @@ except ImportError:
     ConversationMemory = None
 
 from ..graph.enhanced_query_resolution import EnhancedQueryResolutionAgent
-from ..utils.response_formatter import ResponseFormatter
+from ..utils.response_formatter import ResponseFormatter, get_formatter
 from ..utils.prompt_loader import load_prompt
+import asyncio
 import logging
+import numpy as np
 import pandas as pd
 
 logging.basicConfig(level=logging.INFO)
@@ -272,8 +275,6 @@ class ValidationAgent:
         """
         
         try:
-            import pandas as pd
-            
             extracted_data = data.get("data")
             
             if extracted_data is None or extracted_data.empty:
@@ -314,8 +315,6 @@ class ValidationAgent:
         This replaces generic analysis with concrete answers
         """
         try:
-            import pandas as pd
-            
             query_lower = query.lower()
             numeric_cols = data.select_dtypes(include=['number']).columns.tolist()
             categorical_cols = data.select_dtypes(include=['object', 'category']).columns.tolist()
@@ -452,13 +451,67 @@ class MultiAgentOrchestrator:
     ):
         self.processor = processor or get_processor()
         self.conversation_memory = conversation_memory
-        self.formatter = response_formatter or ResponseFormatter(self.processor)
+        self.formatter = response_formatter or get_formatter(self.processor)
         
         # Initialize agents with conversation memory
         self.query_agent = QueryResolutionAgent(self.processor, conversation_memory)
         self.data_agent = DataExtractionAgent(self.processor)
         self.validation_agent = ValidationAgent(self.processor)
     
+    def reset(self, conversation_memory: Optional[ConversationMemory] = None):
+        """
+        Start a fresh conversation without rebuilding the agents
+        
+        Args:
+            conversation_memory: Memory to use from now on; None keeps the current one
+        """
+        if conversation_memory is not None:
+            self.conversation_memory = conversation_memory
+            self.query_agent.memory = conversation_memory
+            self.query_agent.enhanced_agent.memory = conversation_memory
+    
+    def warmup(self):
+        """Build the processor's schema map ahead of the first question (safe on a background thread)"""
+        try:
+            self.processor.get_schema_map()
+        except Exception as e:
+            logger.warning(f"Orchestrator warmup failed: {e}")
+    
+    async def aprocess_query(self, user_query: str) -> Dict[str, Any]:
+        """
+        Async counterpart of process_query, matching LangGraphQueryAgent's interface
+        
+        The pipeline is sequential and synchronous, so it runs on a worker thread
+        instead of blocking the caller's event loop.
+        """
+        return await asyncio.to_thread(self.process_query, user_query)
+    
+    async def aprocess_queries(
+        self,
+        user_queries: List[str],
+        max_concurrency: int = QUERY_BATCH_CONCURRENCY
+    ) -> List[Dict[str, Any]]:
+        """
+        Answer several independent questions at once, at most max_concurrency in flight
+        
+        A failing question yields an error result instead of cancelling the rest.
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+        
+        async def run_one(user_query: str) -> Dict[str, Any]:
+            async with semaphore:
+                return await self.aprocess_query(user_query)
+        
+        results = await asyncio.gather(*(run_one(q) for q in user_queries), return_exceptions=True)
+        return [
+            self._format_error_response(query, {"error": str(result)}) if isinstance(result, Exception) else result
+            for query, result in zip(user_queries, results)
+        ]
+    
+    def process_queries(self, user_queries: List[str]) -> List[Dict[str, Any]]:
+        """Blocking wrapper around aprocess_queries (call from synchronous code only)"""
+        return asyncio.run(self.aprocess_queries(user_queries))
+    
     def process_query(self, user_query: str) -> Dict[str, Any]:
         """
         End-to-end query processing with conversation memory and confidence scoring
@@ -598,9 +651,6 @@ class DataAnalystAgent:
             }
         """
         try:
-            import pandas as pd
-            import numpy as np
-            
             # Get data
             data = self.processor.query(f"SELECT * FROM {table_name}")
             stats = self.processor.get_table_stats(table_name)
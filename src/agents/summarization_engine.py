@@ -48,7 +48,7 @@ class SummarizationEngine:
             sample_data = self.processor.query(f"SELECT * FROM {table_name} LIMIT 10")
             
             # Calculate numeric insights
-            numeric_cols = self.processor.get_numeric_columns(table_name)
+            numeric_cols = stats.get("numeric_columns") or self.processor.get_numeric_columns(table_name)
             numeric_insights = {}
             
             for col in numeric_cols[:5]:  # Limit to 5 numeric columns
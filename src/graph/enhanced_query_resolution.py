@@ -9,6 +9,7 @@ from typing import Dict, List, Any, Optional
 from langchain_core.messages import HumanMessage, SystemMessage
 from ..utils.data_processor import get_processor
 from ..utils.llm_config import get_llm
+from ..utils.config import LLM_MAX_CONCURRENCY
 
 # Optional import - requires faiss
 try:
@@ -20,9 +21,29 @@ from ..utils.prompt_loader import format_prompt
 import logging
 from difflib import SequenceMatcher
 
-logging.basicConfig(level=logging.INFO)
+if not logging.getLogger().handlers:
+    logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Follow-up suggestions per query type, shared across calls
+_FOLLOWUPS = {
+    "summary": (
+        "Can you break down by region?",
+        "What's the trend over time?",
+        "Compare with previous period?"
+    ),
+    "analytical": (
+        "Which segment performed best?",
+        "What's the growth rate?",
+        "Show comparison with competitors?"
+    ),
+    "comparison": (
+        "What are the key drivers?",
+        "Which variables had most impact?",
+        "Forecast for next period?"
+    )
+}
+
 
 class EnhancedQueryResolutionAgent:
     """
@@ -77,7 +98,6 @@ class EnhancedQueryResolutionAgent:
                     best_match = col
                     best_ratio = ratio
         
-        logger.info(f"Fuzzy match: '{user_term}' -> '{best_match}' (ratio: {best_ratio:.2f})")
         return best_match
     
     def get_table_schema(self, table_name: str) -> Dict[str, List[str]]:
@@ -138,69 +158,68 @@ class EnhancedQueryResolutionAgent:
         
         try:
             tables = self.processor.list_tables()
-            tables_info = "\n".join(tables) if tables else "No tables loaded"
-            
-            # Build detailed schema information
             schema_info = self.build_schema_info()
-            
-            # Build context-aware prompt
-            context_part = ""
-            if rag_context:
-                context_part = f"\n\nPrevious conversation context:\n{rag_context}"
-            
-            # Load prompt from file
-            system_prompt = format_prompt(
-                "query_resolution_prompt",
-                schema_info=schema_info,
-                context_part=context_part
+            messages = self._build_messages(user_query, schema_info, rag_context)
+            response = self.llm.invoke(messages)
+            return self._parse_response(response.content, user_query, tables)
+        
+        except Exception as e:
+            logger.error(f"Query resolution failed: {e}")
+            return {
+                "error": str(e),
+                "confidence_score": 0.0,
+                "parsed_intent": user_query
+            }
+    
+    def resolve_queries_batch(
+        self,
+        queries: List[str],
+        rag_contexts: Optional[List[Optional[str]]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Resolve several independent queries with a single batched LLM call
+        
+        Args:
+            queries: User queries (e.g. decomposed sub-queries)
+            rag_contexts: Optional conversation context per query
+        
+        Returns:
+            One resolution dict per query, in input order (same shape as resolve_query)
+        """
+        if not queries:
+            return []
+        rag_contexts = rag_contexts or [None] * len(queries)
+        
+        try:
+            tables = self.processor.list_tables()
+            # Schema is shared by every prompt in the batch
+            schema_info = self.build_schema_info()
+            messages_list = [
+                self._build_messages(query, schema_info, rag_context)
+                for query, rag_context in zip(queries, rag_contexts)
+            ]
+            responses = self.llm.batch(
+                messages_list,
+                config={"max_concurrency": LLM_MAX_CONCURRENCY},
+                return_exceptions=True
             )
-            
-            messages = [
-                SystemMessage(content=system_prompt),
-                HumanMessage(content=f"User Query: {user_query}")
+        except Exception as e:
+            logger.error(f"Batch query resolution failed: {e}")
+            return [
+                {"error": str(e), "confidence_score": 0.0, "parsed_intent": query}
+                for query in queries
             ]
-            
-            response = self.llm.invoke(messages)
-            
-            # Parse response
-            try:
-                # Extract JSON from response
-                response_text = response.content.strip()
-                
-                # Handle markdown code blocks
-                if "```json" in response_text:
-                    response_text = response_text.split("```json")[1].split("```")[0]
-                elif "```" in response_text:
-                    response_text = response_text.split("```")[1].split("```")[0]
-                
-                result = json.loads(response_text.strip())
-                
-                # Ensure all required fields
-                result.setdefault("confidence_score", 0.7)
-                result.setdefault("requires_context", False)
-                result.setdefault("suggested_visualizations", [])
-                result.setdefault("limit", 100)
-                
-                # Post-process: Apply fuzzy matching to resolve columns to actual names
-                result = self._resolve_columns_to_actuals(result)
-                
-                logger.info(f"Query resolved with confidence: {result['confidence_score']}")
-                return result
-                
-            except json.JSONDecodeError as e:
-                logger.error(f"Failed to parse LLM response: {e}")
-                # Return default structured response
-                return {
-                    "query_type": "analytical",
-                    "primary_table": tables[0] if tables else "unknown",
-                    "entities": [],
-                    "filters": {},
-                    "aggregations": [],
-                    "parsed_intent": user_query,
-                    "confidence_score": 0.3,
-                    "requires_context": False,
-                    "suggested_visualizations": []
-                }
+        
+        return self._collect_batch(queries, responses, tables)
+    
+    async def aresolve_query(self, user_query: str, rag_context: Optional[str] = None) -> Dict[str, Any]:
+        """Async variant of resolve_query; the LLM call does not block the event loop"""
+        try:
+            tables = self.processor.list_tables()
+            schema_info = self.build_schema_info()
+            messages = self._build_messages(user_query, schema_info, rag_context)
+            response = await self.llm.ainvoke(messages)
+            return self._parse_response(response.content, user_query, tables)
         
         except Exception as e:
             logger.error(f"Query resolution failed: {e}")
@@ -210,6 +229,112 @@ class EnhancedQueryResolutionAgent:
                 "parsed_intent": user_query
             }
     
+    async def aresolve_queries_batch(
+        self,
+        queries: List[str],
+        rag_contexts: Optional[List[Optional[str]]] = None
+    ) -> List[Dict[str, Any]]:
+        """Async variant of resolve_queries_batch"""
+        if not queries:
+            return []
+        rag_contexts = rag_contexts or [None] * len(queries)
+        
+        try:
+            tables = self.processor.list_tables()
+            schema_info = self.build_schema_info()
+            messages_list = [
+                self._build_messages(query, schema_info, rag_context)
+                for query, rag_context in zip(queries, rag_contexts)
+            ]
+            responses = await self.llm.abatch(
+                messages_list,
+                config={"max_concurrency": LLM_MAX_CONCURRENCY},
+                return_exceptions=True
+            )
+        except Exception as e:
+            logger.error(f"Batch query resolution failed: {e}")
+            return [
+                {"error": str(e), "confidence_score": 0.0, "parsed_intent": query}
+                for query in queries
+            ]
+        
+        return self._collect_batch(queries, responses, tables)
+    
+    def _collect_batch(self, queries: List[str], responses: list, tables: List[str]) -> List[Dict[str, Any]]:
+        """Parse batched LLM responses, turning per-query exceptions into error results"""
+        results = []
+        for query, response in zip(queries, responses):
+            if isinstance(response, Exception):
+                logger.error(f"Query resolution failed: {response}")
+                results.append({
+                    "error": str(response),
+                    "confidence_score": 0.0,
+                    "parsed_intent": query
+                })
+            else:
+                results.append(self._parse_response(response.content, query, tables))
+        return results
+    
+    def _build_messages(self, user_query: str, schema_info: str, rag_context: Optional[str] = None) -> list:
+        """Build the resolution prompt messages for a single query"""
+        # Build context-aware prompt
+        context_part = ""
+        if rag_context:
+            context_part = f"\n\nPrevious conversation context:\n{rag_context}"
+        
+        # Load prompt from file
+        system_prompt = format_prompt(
+            "query_resolution_prompt",
+            schema_info=schema_info,
+            context_part=context_part
+        )
+        
+        return [
+            SystemMessage(content=system_prompt),
+            HumanMessage(content=f"User Query: {user_query}")
+        ]
+    
+    def _parse_response(self, content: str, user_query: str, tables: List[str]) -> Dict[str, Any]:
+        """Parse the LLM's JSON answer into a resolution dict"""
+        try:
+            # Extract JSON from response
+            response_text = content.strip()
+            
+            # Handle markdown code blocks
+            if "```json" in response_text:
+                response_text = response_text.split("```json")[1].split("```")[0]
+            elif "```" in response_text:
+                response_text = response_text.split("```")[1].split("```")[0]
+            
+            result = json.loads(response_text.strip())
+            
+            # Ensure all required fields
+            result.setdefault("confidence_score", 0.7)
+            result.setdefault("requires_context", False)
+            result.setdefault("suggested_visualizations", [])
+            result.setdefault("limit", 100)
+            
+            # Post-process: Apply fuzzy matching to resolve columns to actual names
+            result = self._resolve_columns_to_actuals(result)
+            
+            logger.info(f"Query resolved with confidence: {result['confidence_score']}")
+            return result
+            
+        except json.JSONDecodeError as e:
+            logger.error(f"Failed to parse LLM response: {e}")
+            # Return default structured response
+            return {
+                "query_type": "analytical",
+                "primary_table": tables[0] if tables else "unknown",
+                "entities": [],
+                "filters": {},
+                "aggregations": [],
+                "parsed_intent": user_query,
+                "confidence_score": 0.3,
+                "requires_context": False,
+                "suggested_visualizations": []
+            }
+    
     def _resolve_columns_to_actuals(self, query_result: Dict[str, Any]) -> Dict[str, Any]:
         """
         Post-process query result to resolve column references to actual column names
@@ -226,14 +351,28 @@ class EnhancedQueryResolutionAgent:
             if not actual_columns:
                 return query_result
             
+            # Names the LLM already copied verbatim from the schema need no fuzzy pass
+            valid = set(actual_columns)
+            
+            # Collected as (section, original, matched) and logged once at the end
+            resolutions = []
+            
+            def resolve(section: str, name: str) -> Optional[str]:
+                if name in valid:
+                    return name
+                matched = self.fuzzy_match_column(name, actual_columns, threshold=0.5)
+                if matched:
+                    resolutions.append((section, name, matched))
+                return matched
+            
             # Resolve entities (columns to select)
-            if "entities" in query_result and query_result["entities"]:
+            entities = query_result.get("entities")
+            if entities and not valid.issuperset(entities):
                 resolved_entities = []
-                for entity in query_result["entities"]:
-                    matched = self.fuzzy_match_column(entity, actual_columns, threshold=0.5)
+                for entity in entities:
+                    matched = resolve("entity", entity)
                     if matched:
                         resolved_entities.append(matched)
-                        logger.info(f"Resolved entity '{entity}' -> '{matched}'")
                     else:
                         # If no match found, keep original
                         if entity not in resolved_entities:
@@ -241,42 +380,39 @@ class EnhancedQueryResolutionAgent:
                 query_result["entities"] = resolved_entities
             
             # Resolve groupby columns
-            if "groupby" in query_result and query_result["groupby"]:
+            groupby = query_result.get("groupby")
+            if groupby and not valid.issuperset(groupby):
                 resolved_groupby = []
-                for col in query_result["groupby"]:
-                    matched = self.fuzzy_match_column(col, actual_columns, threshold=0.5)
+                for col in groupby:
+                    matched = resolve("groupby", col)
                     if matched:
                         resolved_groupby.append(matched)
-                        logger.info(f"Resolved groupby '{col}' -> '{matched}'")
                     else:
                         if col not in resolved_groupby:
                             resolved_groupby.append(col)
                 query_result["groupby"] = resolved_groupby
             
             # Resolve orderby columns
-            if "orderby" in query_result and query_result["orderby"]:
+            orderby = query_result.get("orderby")
+            if orderby and not valid.issuperset(orderby):
                 resolved_orderby = {}
-                for col, direction in query_result["orderby"].items():
-                    matched = self.fuzzy_match_column(col, actual_columns, threshold=0.5)
-                    if matched:
-                        resolved_orderby[matched] = direction
-                        logger.info(f"Resolved orderby '{col}' -> '{matched}'")
-                    else:
-                        resolved_orderby[col] = direction
+                for col, direction in orderby.items():
+                    matched = resolve("orderby", col)
+                    resolved_orderby[matched or col] = direction
                 query_result["orderby"] = resolved_orderby
             
             # Resolve filter columns
-            if "filters" in query_result and query_result["filters"]:
+            filters = query_result.get("filters")
+            if filters and not valid.issuperset(filters):
                 resolved_filters = {}
-                for col, value in query_result["filters"].items():
-                    matched = self.fuzzy_match_column(col, actual_columns, threshold=0.5)
-                    if matched:
-                        resolved_filters[matched] = value
-                        logger.info(f"Resolved filter '{col}' -> '{matched}'")
-                    else:
-                        resolved_filters[col] = value
+                for col, value in filters.items():
+                    matched = resolve("filter", col)
+                    resolved_filters[matched or col] = value
                 query_result["filters"] = resolved_filters
             
+            if resolutions and logger.isEnabledFor(logging.DEBUG):
+                logger.debug("resolved: %s", resolutions)
+            
             return query_result
         
         except Exception as e:
@@ -313,29 +449,8 @@ class EnhancedQueryResolutionAgent:
         Returns:
             List of suggested follow-up questions
         """
-        suggestions = []
         query_type = query_result.get("query_type", "")
-        
-        if query_type == "summary":
-            suggestions = [
-                "Can you break down by region?",
-                "What's the trend over time?",
-                "Compare with previous period?"
-            ]
-        elif query_type == "analytical":
-            suggestions = [
-                "Which segment performed best?",
-                "What's the growth rate?",
-                "Show comparison with competitors?"
-            ]
-        elif query_type == "comparison":
-            suggestions = [
-                "What are the key drivers?",
-                "Which variables had most impact?",
-                "Forecast for next period?"
-            ]
-        
-        return suggestions
+        return list(_FOLLOWUPS.get(query_type, ()))
 
 
 if __name__ == "__main__":
@@ -3,12 +3,13 @@ LangGraph-based Multi-Agent System for Complex Query Resolution
 Upgraded: Intelligent sub-query decomposition, LLM fallback, and advanced reasoning
 """
 
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple, Callable, Generator, TypedDict
 from langchain_core.messages import HumanMessage, SystemMessage
 from langchain_core.tools import tool
 from langgraph.graph import StateGraph, END
 from ..utils.data_processor import get_processor
 from ..utils.llm_config import get_llm
+from ..utils.config import AGENT_WORKERS, QUERY_BATCH_CONCURRENCY
 
 # Optional import - requires faiss
 try:
@@ -17,8 +18,17 @@ except ImportError:
     ConversationMemory = None
 
 from .enhanced_query_resolution import EnhancedQueryResolutionAgent
-from ..utils.response_formatter import ResponseFormatter
+from ..utils.response_formatter import get_formatter
 from ..utils.prompt_loader import format_prompt, load_prompt
+from ..utils.llm_cache import LLMCache
+from pydantic import BaseModel, Field
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import functools
+import queue
+import threading
+import uuid
+import re
 import logging
 import json
 import pandas as pd
@@ -26,18 +36,339 @@ import pandas as pd
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+
+# Group-by columns (lower-cased) that trigger monthly bucketing
+_DATE_COLS = frozenset({"date", "order date", "order_date", "transaction_date", "txn_date", "sale_date"})
+
+# Aggregation names as emitted in SQL
+_AGG_UPPER = {"sum": "SUM", "avg": "AVG", "count": "COUNT", "min": "MIN", "max": "MAX"}
+_CASTABLE_AGGS = frozenset({"SUM", "AVG", "MAX", "MIN"})
+
+
+def _quote_column(col: str) -> str:
+    """Quote column name if it contains spaces or special characters"""
+    if ' ' in col or '-' in col or any(c in col for c in ['(', ')', '+', '*', '/']):
+        return f'"{col}"'
+    return col
+
+
+def _column_type(column_types: Optional[Dict[str, str]], column: str) -> str:
+    """Look up a column's SQL type; None means the schema was unavailable"""
+    if column_types is None:
+        # If schema check fails, default to safe casting
+        return "VARCHAR"
+    return column_types.get(column, "").upper()
+
+
+def _aggregation_sql(agg: str, column: str, col_type: str) -> str:
+    """
+    Apply aggregation with smart type casting.
+    Only casts to DOUBLE if column is VARCHAR/TEXT - otherwise uses native type.
+    """
+    quoted_col = _quote_column(column)
+    agg_upper = _AGG_UPPER.get(agg.lower()) or agg.upper()
+    
+    # For numeric aggregations, only cast if column is text type
+    if agg_upper in _CASTABLE_AGGS:
+        # Check if column is stored as text
+        if 'VARCHAR' in col_type or 'STRING' in col_type or 'TEXT' in col_type:
+            return f"{agg_upper}(CAST({quoted_col} AS DOUBLE))"
+        else:
+            # Already numeric - no cast needed
+            return f"{agg_upper}({quoted_col})"
+    elif agg_upper == 'COUNT':
+        return f"COUNT({quoted_col})"
+    else:
+        return f"{agg_upper}({quoted_col})"
+
+
+def _freeze(value: Any) -> Any:
+    """Convert lists/dicts into hashable tuples for use as a cache key"""
+    if isinstance(value, dict):
+        return tuple((k, _freeze(v)) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+@functools.lru_cache(maxsize=512)
+def _build_sql_cached(
+    table: str,
+    entities: tuple,
+    groupby: tuple,
+    filters: tuple,
+    aggregations: tuple,
+    orderby: tuple,
+    limit: Any,
+    column_types: Optional[tuple]
+) -> Tuple[str, tuple]:
+    """
+    Build SQL from a frozen query specification (pure, so results are memoized)
+    
+    Filter values are bound as parameters rather than interpolated, so the
+    statement text only depends on the query shape.
+    
+    Returns:
+        (sql, params) with one "?" placeholder per param
+    """
+    filters = dict(filters)
+    orderby = dict(orderby)
+    column_types = dict(column_types) if column_types is not None else None
+    
+    select_clause = "*"
+    groupby_clause = ""
+    orderby_clause = ""
+    
+    # Detect if groupby is a date column for monthly/time-based trend
+    date_groupby = next((col for col in groupby if col.lower() in _DATE_COLS), None)
+    
+    if date_groupby:
+        # Use strftime with explicit CAST for date columns
+        quoted_date_col = _quote_column(date_groupby)
+        month_expr = f"strftime('%Y-%m', CAST({quoted_date_col} AS DATE)) as month"
+        
+        # Build select with aggregations if specified
+        select_parts = [month_expr]
+        for entity in entities:
+            if entity != date_groupby and entity not in filters:
+                if aggregations:
+                    # Apply aggregations to numeric columns with type casting
+                    for agg in aggregations:
+                        agg_expr = _aggregation_sql(agg, entity, _column_type(column_types, entity))
+                        alias = f"{agg}_{entity.replace(' ', '_')}"
+                        select_parts.append(f"{agg_expr} as {alias}")
+                else:
+                    quoted_entity = _quote_column(entity)
+                    select_parts.append(quoted_entity)
+        
+        select_clause = ", ".join(select_parts)
+        groupby_clause = f" GROUP BY month"
+        orderby_clause = " ORDER BY month ASC"
+    else:
+        # Standard SQL building
+        select_parts = []
+        
+        # Always add GROUP BY columns first (required for SQL)
+        if groupby:
+            select_parts.extend([_quote_column(col) for col in groupby])
+        
+        # Then add aggregations on entities
+        if entities and aggregations:
+            for entity in entities:
+                # Only aggregate if entity is not in GROUP BY or FILTERS
+                if entity not in groupby and entity not in filters:
+                    for agg in aggregations:
+                        agg_expr = _aggregation_sql(agg, entity, _column_type(column_types, entity))
+                        alias = f"{agg}_{entity.replace(' ', '_')}"
+                        select_parts.append(f"{agg_expr} as {alias}")
+        elif entities:
+            # No aggregations, just select entities (exclude filter columns)
+            for entity in entities:
+                if entity not in filters:
+                    quoted_entity = _quote_column(entity)
+                    if quoted_entity not in select_parts:  # Avoid duplicates
+                        select_parts.append(quoted_entity)
+        
+        # Fallback to SELECT * if no parts specified
+        select_clause = ", ".join(select_parts) if select_parts else "*"
+        
+        if groupby:
+            quoted_groupby = [_quote_column(col) for col in groupby]
+            groupby_clause = " GROUP BY " + ", ".join(quoted_groupby)
+        
+        if orderby:
+            order_parts = []
+            for col, direction in orderby.items():
+                # If ordering by an aggregated column, use the alias
+                if aggregations and col in entities and col not in groupby:
+                    # Use the aggregation alias (e.g., sum_GROSS_AMT)
+                    alias = f"{aggregations[0]}_{col.replace(' ', '_')}"
+                    order_parts.append(f"{alias} {direction}")
+                else:
+                    # Use the quoted column name
+                    order_parts.append(f"{_quote_column(col)} {direction}")
+            orderby_clause = " ORDER BY " + ", ".join(order_parts)
+    
+    # Build final SQL
+    parts = [f"SELECT {select_clause} FROM {table}"]
+    
+    params = []
+    if filters:
+        where_conditions = []
+        for k, v in filters.items():
+            if isinstance(v, tuple):
+                # List filter -> IN clause
+                if not v:
+                    continue
+                placeholders = ", ".join("?" * len(v))
+                where_conditions.append(f"{_quote_column(k)} IN ({placeholders})")
+                params.extend(v)
+            else:
+                where_conditions.append(f"{_quote_column(k)} = ?")
+                params.append(v)
+        if where_conditions:
+            parts.append(" WHERE " + " AND ".join(where_conditions))
+    
+    parts.append(groupby_clause)
+    parts.append(orderby_clause)
+    parts.append(f" LIMIT {limit}")
+    
+    return "".join(parts), tuple(params)
+
+
+# Query types whose resolution carries sub-queries
+_DECOMPOSE_TYPES = ("comparison", "timeseries", "custom")
+
+# Statements the validate_sql tool rejects
+_FORBIDDEN_SQL = re.compile(r"\b(drop|delete|truncate|alter|update|insert)\b", re.I)
+
+# Recent messages carried in graph state (the full history stays in memory)
+_CONTEXT_MESSAGES = 8
+
+
+class AgentState(TypedDict, total=False):
+    """Workflow state shared by the graph nodes"""
+    user_query: str
+    refinement_count: int
+    query_analysis: Dict[str, Any]
+    conversation_context: List[Tuple[str, str]]
+    rag_context_used: bool
+    analyzed: bool
+    error: str
+    # Absent until decided; its presence lets the graph skip decompose_query
+    sub_queries: List[str]
+    decomposed: bool
+    extracted_data: Dict[str, Any]
+    needs_refine: bool
+    # Set when a refinement would repeat the failed SQL; needs_refine stays True so the failure is reported
+    refine_exhausted: bool
+    llm_fallback: bool
+    validation_message: str
+    llm_analysis: str
+    formatted_response: Dict[str, Any]
+    _last_refine_key: int
+
+
+class Decomposition(BaseModel):
+    """Structured decomposition of a complex query"""
+    sub_queries: List[str] = Field(description="Simple, independently executable sub-queries in logical order")
+
+
+def _agent_node(method_name: str):
+    """Graph node that dispatches to the agent instance carried in the run config"""
+    async def node(state: AgentState, config: Dict[str, Any]) -> AgentState:
+        agent = config["configurable"]["agent"]
+        return await getattr(agent, method_name)(state)
+    node.__name__ = method_name
+    return node
+
+
+# One long-lived event loop serves every synchronous caller. A fresh loop per
+# call (asyncio.run) would strand the LLM clients' async HTTP connections on
+# closed loops, and concurrent queries would no longer share a loop.
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_lock = threading.Lock()
+
+
+def _background_loop() -> asyncio.AbstractEventLoop:
+    """Return the shared agent event loop, starting its thread on first use"""
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="lg-agent-loop", daemon=True).start()
+    return _loop
+
+
+def _run_sync(coro):
+    """Run a coroutine on the shared loop and block until it finishes"""
+    return asyncio.run_coroutine_threadsafe(coro, _background_loop()).result()
+
+
+# One bounded worker pool for every agent instance; threads start on first use
+_agent_pool = ThreadPoolExecutor(max_workers=AGENT_WORKERS, thread_name_prefix="lg-agent")
+
+
 class LangGraphQueryAgent:
-    def __init__(self, processor=None, conversation_memory: Optional[ConversationMemory] = None):
+    # Compiled workflow shared by every instance of the class
+    _COMPILED_GRAPH = None
+
+    def __init__(
+        self,
+        processor=None,
+        conversation_memory: Optional[ConversationMemory] = None,
+        executor: Optional[ThreadPoolExecutor] = None
+    ):
         self.processor = processor or get_processor()
         self.memory = conversation_memory
         self.llm = get_llm(temperature=0.1)
         self.enhanced_agent = EnhancedQueryResolutionAgent(self.processor, self.memory)
-        self.formatter = ResponseFormatter(self.processor)
+        self.formatter = get_formatter(self.processor)
+        # Serves repeated prompts (exact match) without an LLM round-trip
+        self.llm_cache = LLMCache()
+        
+        # Structured output removes the parse-failure path of free-text JSON decomposition
+        try:
+            self._decomposer = self.llm.with_structured_output(Decomposition)
+        except NotImplementedError:
+            self._decomposer = None
+        
+        # Prompt templates used on every complex query
+        self._decomposition_prompt = load_prompt("query_decomposition_prompt")
+        self._llm_analysis_template = load_prompt("llm_analysis_prompt")
         
         # Define tools for intelligent reasoning
         self.tools = self._define_tools()
         # Note: Tools are defined but direct execution is handled in workflow nodes
-        self.graph = self._build_graph()
+        # The workflow itself is stateless: compile it once per class and hand
+        # this instance to the nodes through the run config
+        cls = type(self)
+        if cls.__dict__.get("_COMPILED_GRAPH") is None:
+            cls._COMPILED_GRAPH = cls._build_graph()
+        self.graph = cls._COMPILED_GRAPH
+        self._run_config = {"configurable": {"agent": self}}
+        
+        # Blocking node work (SQL, embeddings, charts) runs on the process-wide pool, so
+        # neither concurrent queries nor per-message agents can multiply threads. An
+        # injected pool is shared with the caller and left for them to shut down.
+        self._executor = executor or _agent_pool
+        
+        # Result frames of in-flight queries; graph state only carries their frame_id
+        self._frame_cache: Dict[str, pd.DataFrame] = {}
+    
+    def reset(self, conversation_memory: Optional[ConversationMemory] = None):
+        """
+        Start a fresh conversation without rebuilding the agent
+        
+        Keeps the LLM client, compiled graph, worker pool and LLM cache
+        (which never stores context-dependent answers).
+        
+        Args:
+            conversation_memory: Memory to use from now on; None keeps the current one
+        """
+        if conversation_memory is not None:
+            self.memory = conversation_memory
+            self.enhanced_agent.memory = conversation_memory
+        self._frame_cache.clear()
+    
+    def warmup(self):
+        """
+        Pay one-time startup costs ahead of the first question
+        
+        Starts the shared event loop and builds the schema map. Makes no LLM calls
+        and records nothing in conversation memory. Safe to run on a background thread.
+        """
+        try:
+            _background_loop()
+            self.processor.get_schema_map()
+            logger.info("LangGraph agent warmed up")
+        except Exception as e:
+            logger.warning(f"Agent warmup failed: {e}")
+    
+    async def _in_thread(self, func: Callable, *args, **kwargs):
+        """Run a blocking call on the agent's worker pool without blocking the event loop"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
     
     def _define_tools(self) -> List[tool]:
         """Define tools available to the agents for intelligent reasoning"""
@@ -49,7 +380,7 @@ class LangGraphQueryAgent:
                 result = self.processor.query(sql_query)
                 return {
                     "success": True,
-                    "row_count": len(result) if hasattr(result, '__len__') else 0,
+                    "row_count": len(result),
                     "data": result,
                     "error": None
                 }
@@ -65,14 +396,11 @@ class LangGraphQueryAgent:
         def get_table_info() -> Dict[str, Any]:
             """Get information about available tables and columns"""
             try:
-                tables = self.processor.list_tables()
-                table_info = {}
-                for table in tables:
-                    columns = self.processor.get_table_columns(table)
-                    table_info[table] = columns
+                # Cached on the processor until the next table load
+                table_info = self.processor.get_schema_map()
                 return {
                     "tables": table_info,
-                    "table_count": len(tables)
+                    "table_count": len(table_info)
                 }
             except Exception as e:
                 logger.error(f"Tool get_table_info failed: {e}")
@@ -89,7 +417,7 @@ class LangGraphQueryAgent:
                 if not sql_lower.startswith("select"):
                     issues.append("Query must start with SELECT")
                 
-                if "drop" in sql_lower or "delete" in sql_lower or "truncate" in sql_lower:
+                if _FORBIDDEN_SQL.search(sql_lower):
                     issues.append("Destructive operations not allowed")
                 
                 if len(issues) > 0:
@@ -101,24 +429,32 @@ class LangGraphQueryAgent:
         
         return [query_database, get_table_info, validate_sql]
 
-    def _build_graph(self):
-        workflow = StateGraph(dict)
-        workflow.add_node("analyze_query", self._node_analyze_query)
-        workflow.add_node("decompose_query", self._node_decompose_query)
-        workflow.add_node("extract_data", self._node_extract_data)
-        workflow.add_node("llm_analysis", self._node_llm_analysis)
-        workflow.add_node("validate_results", self._node_validate_results)
-        workflow.add_node("refine_query", self._node_refine_query)
-        workflow.add_node("format_response", self._node_format_response)
+    @classmethod
+    def _build_graph(cls):
+        workflow = StateGraph(AgentState)
+        workflow.add_node("analyze_query", _agent_node("_node_analyze_query"))
+        workflow.add_node("decompose_query", _agent_node("_node_decompose_query"))
+        workflow.add_node("extract_data", _agent_node("_node_extract_data"))
+        workflow.add_node("llm_analysis", _agent_node("_node_llm_analysis"))
+        workflow.add_node("validate_results", _agent_node("_node_validate_results"))
+        workflow.add_node("refine_query", _agent_node("_node_refine_query"))
+        workflow.add_node("format_response", _agent_node("_node_format_response"))
         # Edges: strictly sequential, only one path at a time
-        workflow.add_edge("analyze_query", "decompose_query")
+        # Analysis: skip the decomposition hop whenever analyze_query already settled the sub-queries
+        def analysis_router(state):
+            return "extract_data" if "sub_queries" in state else "decompose_query"
+        workflow.add_conditional_edges(
+            "analyze_query",
+            analysis_router,
+            {"extract_data": "extract_data", "decompose_query": "decompose_query"}
+        )
         workflow.add_edge("decompose_query", "extract_data")
         workflow.add_edge("extract_data", "validate_results")
         # Validation: decide next step
         def validation_router(state):
-            if state.get("needs_refine", False) and state.get("refinement_count", 0) < 2:
+            if state["needs_refine"] and state["refinement_count"] < 2:
                 return "refine_query"
-            elif state.get("llm_fallback"):
+            elif state["llm_fallback"]:
                 return "llm_analysis"
             else:
                 return "format_response"
@@ -127,37 +463,50 @@ class LangGraphQueryAgent:
             validation_router,
             {"refine_query": "refine_query", "llm_analysis": "llm_analysis", "format_response": "format_response"}
         )
-        workflow.add_edge("refine_query", "extract_data")
+        # Refinement: retry extraction unless the refined query is unchanged
+        def refine_router(state):
+            return "llm_analysis" if state.get("refine_exhausted") else "extract_data"
+        workflow.add_conditional_edges(
+            "refine_query",
+            refine_router,
+            {"extract_data": "extract_data", "llm_analysis": "llm_analysis"}
+        )
         workflow.add_edge("llm_analysis", "format_response")
         workflow.add_edge("format_response", END)
         workflow.set_entry_point("analyze_query")
         return workflow.compile()
 
-    def _ensure_flat_state(self, state: Dict[str, Any], node_name: str) -> Dict[str, Any]:
-        if not isinstance(state, dict):
-            logger.error(f"{node_name}: State is not a dict! Actual type: {type(state)}")
-            raise ValueError(f"{node_name}: State must be a dict, got {type(state)}")
-        if any(isinstance(v, dict) and k == "root" for k, v in state.items()):
-            logger.error(f"{node_name}: State contains a nested dict at root key!")
-            raise ValueError(f"{node_name}: State contains a nested dict at root key!")
-        logger.debug(f"{node_name}: State type OK. Keys: {list(state.keys())}")
-        return state
-
-    def _node_analyze_query(self, state: Dict[str, Any]) -> Dict[str, Any]:
-        user_query = state.get("user_query", "")
+    async def _node_analyze_query(self, state: AgentState) -> AgentState:
+        user_query = state["user_query"]
         logger.info(f"LangGraph: Analyzing query: {user_query}")
         
         try:
+            # Exact-match probe (a hash lookup, no embedding)
+            cache_key = self._schema_cache_key(user_query)
+            analysis = self.llm_cache.lookup("analyze", cache_key)
+            
             # Build RAG context for conversation continuity
             rag_context = None
             if self.memory:
-                rag_context = self.memory.build_rag_context(user_query, k=2)
+                rag_context = await self._in_thread(self.memory.build_rag_context, user_query, 2)
                 logger.info(f"RAG context built with {len(self.memory.messages)} conversation messages")
             
             # Use enhanced agent for query resolution with RAG context
-            analysis = self.enhanced_agent.resolve_query(user_query, rag_context)
+            if analysis is None:
+                analysis = await self.enhanced_agent.aresolve_query(user_query, rag_context)
+                # Context-dependent resolutions ("what about Q3?") are only valid for this turn
+                if not analysis.get("error") and not analysis.get("requires_context"):
+                    self.llm_cache.store("analyze", cache_key, analysis)
+            # The resolution prompt also decomposes complex queries, saving a separate LLM call;
+            # None (key missing) leaves decomposition to decompose_query
+            sub_queries = analysis.pop("sub_queries", None)
+            if analysis.get("query_type") not in _DECOMPOSE_TYPES:
+                sub_queries = []
+            if sub_queries is not None:
+                state["sub_queries"] = [str(q) for q in sub_queries]
+                state["decomposed"] = bool(sub_queries)
             state["query_analysis"] = analysis
-            state["conversation_context"] = self.memory.messages if self.memory else []
+            state["conversation_context"] = self.memory.recent(_CONTEXT_MESSAGES) if self.memory else []
             state["rag_context_used"] = rag_context is not None
             state["analyzed"] = True
             logger.info(f"Query analyzed successfully: {analysis.get('parsed_intent')} (confidence: {analysis.get('confidence_score', 0):.2f})")
@@ -166,6 +515,7 @@ class LangGraphQueryAgent:
             state["error"] = str(e)
             state["analyzed"] = False
             # Provide fallback analysis
+            state["sub_queries"] = []
             state["query_analysis"] = {
                 "query_type": "analytical",
                 "parsed_intent": user_query,
@@ -173,21 +523,37 @@ class LangGraphQueryAgent:
                 "error": str(e)
             }
         
-        return self._ensure_flat_state(state, "analyze_query")
+        return state
+
+    def _schema_cache_key(self, text: str) -> str:
+        """
+        Cache key for analyze/decompose results: exact text plus the processor's schema version
+        
+        These results embed literal filters, limits, dates and table names, so near-duplicate
+        questions ("top 5" vs "top 10") must not share them, and a load or re-clean retires them.
+        """
+        return f"{self.processor.schema_version}\n{text}"
 
-    def _node_decompose_query(self, state: Dict[str, Any]) -> Dict[str, Any]:
+    async def _node_decompose_query(self, state: AgentState) -> AgentState:
+        # Only reached when analyze_query's answer carried no sub_queries
         analysis = state.get("query_analysis", {})
         query_type = analysis.get("query_type", "analytical")
         logger.info(f"LangGraph: Decomposing query type: {query_type}")
-        if query_type in ["comparison", "timeseries", "custom"]:
+        if query_type in _DECOMPOSE_TYPES:
             try:
-                decomposition_prompt = load_prompt("query_decomposition_prompt")
-                messages = [
-                    SystemMessage(content=decomposition_prompt),
-                    HumanMessage(content=f"Decompose this complex query into simple sub-queries:\n\n{analysis.get('parsed_intent')}\n\nReturn ONLY a JSON array of strings.")
-                ]
-                response = self.llm.invoke(messages)
-                sub_queries = json.loads(response.content)
+                parsed_intent = str(analysis.get("parsed_intent"))
+                cache_key = self._schema_cache_key(parsed_intent)
+                sub_queries = self.llm_cache.lookup("decompose", cache_key)
+                if sub_queries is None:
+                    messages = [
+                        SystemMessage(content=self._decomposition_prompt),
+                        HumanMessage(content=f"Decompose this complex query into simple sub-queries:\n\n{parsed_intent}\n\nReturn ONLY a JSON array of strings.")
+                    ]
+                    if self._decomposer is not None:
+                        sub_queries = (await self._decomposer.ainvoke(messages)).sub_queries
+                    else:
+                        sub_queries = self._parse_sub_queries((await self.llm.ainvoke(messages)).content)
+                    self.llm_cache.store("decompose", cache_key, sub_queries)
                 state["sub_queries"] = sub_queries
                 state["decomposed"] = True
             except Exception as e:
@@ -197,42 +563,42 @@ class LangGraphQueryAgent:
         else:
             state["sub_queries"] = []
             state["decomposed"] = False
-        return self._ensure_flat_state(state, "decompose_query")
+        return state
 
-    def _node_extract_data(self, state: Dict[str, Any]) -> Dict[str, Any]:
+    def _parse_sub_queries(self, content: str) -> List[str]:
+        """Extract a JSON array of sub-queries from free-form LLM text"""
+        # Models often wrap the array in prose or markdown fences
+        match = re.search(r"\[.*\]", content, re.S)
+        sub_queries = json.loads(match.group(0) if match else content)
+        return [str(q) for q in sub_queries]
+
+    async def _node_extract_data(self, state: AgentState) -> AgentState:
         analysis = state.get("query_analysis", {})
         sub_queries = state.get("sub_queries", [])
         logger.info(f"LangGraph: Extracting data for: {analysis.get('parsed_intent')}")
+        # A refinement retry replaces the previous attempt's frame
+        stale_id = state.get("extracted_data", {}).get("frame_id")
+        if stale_id:
+            self._frame_cache.pop(stale_id, None)
         
         try:
             if sub_queries:
                 logger.info(f"Executing {len(sub_queries)} sub-queries...")
-                all_results = []
-                for idx, sub_q in enumerate(sub_queries):
-                    try:
-                        # Build RAG context for sub-query resolution
-                        rag_context = None
-                        if self.memory:
-                            rag_context = self.memory.build_rag_context(sub_q, k=2)
-                        
-                        sub_analysis = self.enhanced_agent.resolve_query(sub_q, rag_context)
-                        sql = self._build_sql(sub_analysis)
-                        logger.info(f"Sub-query {idx+1} SQL: {sql}")
-                        result = self.processor.query(sql)
-                        all_results.append({
-                            "data": result, 
-                            "sql": sql, 
-                            "row_count": len(result) if hasattr(result, '__len__') else 0, 
-                            "sub_query": sub_q,
-                            "success": True
-                        })
-                    except Exception as sub_e:
-                        logger.error(f"Sub-query {idx+1} failed: {sub_e}")
-                        all_results.append({
-                            "error": str(sub_e),
-                            "sub_query": sub_q,
-                            "success": False
-                        })
+                # Resolve every sub-query in one batched LLM call
+                rag_contexts = None
+                if self.memory:
+                    rag_contexts = await self._in_thread(
+                        lambda: [self.memory.build_rag_context(sub_q, k=2) for sub_q in sub_queries]
+                    )
+                sub_analyses = await self.enhanced_agent.aresolve_queries_batch(sub_queries, rag_contexts)
+                
+                # DataProcessor.query serializes on its connection lock (uploaded frames are registered
+                # on the main connection only, so cursors can't see them): run the SQL in one
+                # worker-thread loop rather than a fan-out that would just queue on the lock
+                all_results = await self._in_thread(lambda: [
+                    self._run_subquery(idx, sub_q, sub_analysis)
+                    for idx, (sub_q, sub_analysis) in enumerate(zip(sub_queries, sub_analyses))
+                ])
                 
                 # Combine results intelligently
                 combined = self._combine_results(all_results)
@@ -242,13 +608,16 @@ class LangGraphQueryAgent:
                     "row_count": combined.get("row_count", 0)
                 }
             else:
-                sql = self._build_sql(analysis)
+                sql, params = self._build_sql(analysis)
                 logger.info(f"Executing SQL: {sql}")
-                result = self.processor.query(sql)
+                result = await self._in_thread(self.processor.query, sql, params)
+                frame_id = uuid.uuid4().hex
+                self._frame_cache[frame_id] = result
                 state["extracted_data"] = {
-                    "data": result, 
-                    "row_count": len(result) if hasattr(result, '__len__') else 0, 
+                    "frame_id": frame_id, 
+                    "row_count": len(result), 
                     "sql": sql,
+                    "params": params,
                     "success": True
                 }
             
@@ -258,40 +627,73 @@ class LangGraphQueryAgent:
             logger.error(f"LangGraph: Data extraction failed: {e}")
             state["extracted_data"] = {"error": str(e), "success": False}
         
-        return self._ensure_flat_state(state, "extract_data")
+        return state
+
+    def _frame(self, extracted: Dict[str, Any]) -> Optional[pd.DataFrame]:
+        """Resolve extracted_data's frame handle (or inline data) to the result frame"""
+        frame_id = extracted.get("frame_id")
+        if frame_id:
+            return self._frame_cache.get(frame_id)
+        return extracted.get("data")
+
+    def _run_subquery(self, idx: int, sub_q: str, sub_analysis: Dict[str, Any]) -> Dict[str, Any]:
+        """Build and execute a single resolved sub-query"""
+        try:
+            if sub_analysis.get("error"):
+                raise ValueError(sub_analysis["error"])
+            sql, params = self._build_sql(sub_analysis)
+            logger.info(f"Sub-query {idx+1} SQL: {sql}")
+            result = self.processor.query(sql, params)
+            return {
+                "data": result, 
+                "sql": sql, 
+                "params": params,
+                "row_count": len(result), 
+                "sub_query": sub_q,
+                "success": True
+            }
+        except Exception as sub_e:
+            logger.error(f"Sub-query {idx+1} failed: {sub_e}")
+            return {
+                "error": str(sub_e),
+                "sub_query": sub_q,
+                "success": False
+            }
 
-    def _node_llm_analysis(self, state: Dict[str, Any]) -> Dict[str, Any]:
-        user_query = state.get("user_query", "")
+    async def _node_llm_analysis(self, state: AgentState) -> AgentState:
+        user_query = state["user_query"]
         extracted = state.get("extracted_data", {})
         analysis = state.get("query_analysis", {})
         logger.info("LangGraph: Extracting insights from data...")
         try:
             # Prepare data summary for LLM
-            data_df = extracted.get("data")
+            data_df = self._frame(extracted)
             if data_df is not None and isinstance(data_df, pd.DataFrame):
-                # For better LLM understanding, show full data more clearly
+                # CSV rendering is C-accelerated and more compact (fewer tokens) than to_string
                 if len(data_df) <= 50:
                     # Small dataset - show everything
-                    data_display = data_df.to_string(index=False)
+                    data_display = data_df.to_csv(index=False, float_format="%.4g")
                     data_size_info = f"Complete dataset ({len(data_df)} rows):"
                 else:
                     # Large dataset - show top 30 rows
-                    data_display = data_df.head(30).to_string(index=False)
+                    data_display = data_df.head(30).to_csv(index=False, float_format="%.4g")
                     data_size_info = f"Top 30 of {len(data_df)} total rows:"
                 
                 # Add descriptive stats only for large datasets
                 stats_info = ""
                 if len(data_df) > 50:
-                    numeric_cols = data_df.select_dtypes(include=['number']).columns
-                    if len(numeric_cols) > 0:
-                        stats_info = f"\n\nNumeric Column Statistics:\n{data_df[numeric_cols].describe().to_string()}"
+                    numeric_df = data_df.select_dtypes(include=['number'])
+                    if len(numeric_df.columns) > 0:
+                        # Limit wide tables to the 8 most variable numeric columns
+                        top_cols = numeric_df.var().nlargest(8).index
+                        stats = numeric_df[top_cols].agg(['mean', 'std', 'min', 'max']).round(4)
+                        stats_info = f"\n\nNumeric Column Statistics:\n{stats.to_csv()}"
             else:
                 data_display = str(extracted.get("sub_results", []))
                 data_size_info = "Query Results:"
                 stats_info = ""
             
-            llm_analysis_template = load_prompt("llm_analysis_prompt")
-            insight_prompt = llm_analysis_template.format(
+            insight_prompt = self._llm_analysis_template.format(
                 user_query=user_query,
                 data_size_info=data_size_info,
                 data_display=data_display,
@@ -301,54 +703,105 @@ class LangGraphQueryAgent:
                 orderby=analysis.get('orderby', {})
             )
             
-            messages = [
-                SystemMessage(content=insight_prompt)
-            ]
-            response = self.llm.invoke(messages)
-            state["llm_analysis"] = response.content
+            # The prompt embeds the result data, so only an identical prompt may reuse an answer
+            cached_analysis = self.llm_cache.lookup("analysis", insight_prompt)
+            if cached_analysis is not None:
+                state["llm_analysis"] = cached_analysis
+            else:
+                messages = [
+                    SystemMessage(content=insight_prompt)
+                ]
+                # Streamed so process_query_stream can surface tokens as they arrive
+                content = "".join([chunk.content async for chunk in self.llm.astream(messages)])
+                state["llm_analysis"] = content
+                self.llm_cache.store("analysis", insight_prompt, content)
         except Exception as e:
             logger.error(f"LLM analysis failed: {e}")
-            state["llm_analysis"] = f"Analysis: {extracted.get('data', 'No data available')}"
-        return self._ensure_flat_state(state, "llm_analysis")
+            data_df = self._frame(extracted)
+            state["llm_analysis"] = f"Analysis: {data_df if data_df is not None else 'No data available'}"
+        return state
 
-    def _node_validate_results(self, state: Dict[str, Any]) -> Dict[str, Any]:
+    async def _node_validate_results(self, state: AgentState) -> AgentState:
         data = state.get("extracted_data", {})
+        row_count = data.get("row_count", 0)
         logger.info("LangGraph: Validating results...")
         if data.get("error"):
             state["needs_refine"] = True
             state["validation_message"] = data["error"]
             state["llm_fallback"] = True
-        elif data.get("row_count", 0) == 0:
+        elif row_count == 0:
             state["needs_refine"] = True
             state["validation_message"] = "No data found."
             state["llm_fallback"] = True
         else:
             state["needs_refine"] = False
-            state["validation_message"] = f"Valid: {data.get('row_count')} rows."
-            # Always analyze successful queries with LLM for insights
-            state["llm_fallback"] = True
-        return self._ensure_flat_state(state, "validate_results")
+            state["validation_message"] = f"Valid: {row_count} rows."
+            # Analyze successful queries with LLM for insights, unless the answer
+            # is small enough to state directly (e.g. a single-row COUNT)
+            data_df = self._frame(data)
+            query_type = state.get("query_analysis", {}).get("query_type")
+            is_simple = (
+                isinstance(data_df, pd.DataFrame)
+                and row_count <= 3
+                and len(data_df.columns) <= 3
+            )
+            if isinstance(data_df, pd.DataFrame) and (is_simple or query_type in ("lookup", "count")):
+                state["validation_message"] = self._summarize_simple_result(data_df)
+                state["llm_fallback"] = False
+            else:
+                state["llm_fallback"] = True
+        return state
 
-    def _node_refine_query(self, state: Dict[str, Any]) -> Dict[str, Any]:
-        user_query = state.get("user_query", "")
+    def _summarize_simple_result(self, data_df: pd.DataFrame, max_rows: int = 10) -> str:
+        """Render a small result set as a templated answer without calling the LLM"""
+        def fmt(value: Any) -> str:
+            return f"{value:,.2f}" if isinstance(value, float) else str(value)
+        
+        rows = "\n".join(
+            "- " + ", ".join(f"{col}: {fmt(val)}" for col, val in record.items())
+            for record in data_df.head(max_rows).to_dict(orient="records")
+        )
+        return format_prompt("simple_summary_prompt", row_count=len(data_df), rows=rows)
+
+    async def _node_refine_query(self, state: AgentState) -> AgentState:
+        user_query = state["user_query"]
         prev_message = state.get("validation_message", "")
         logger.info(f"LangGraph: Refining query due to: {prev_message}")
         
         # Build RAG context for refinement
         rag_context = None
         if self.memory:
-            rag_context = self.memory.build_rag_context(user_query, k=2)
+            rag_context = await self._in_thread(self.memory.build_rag_context, user_query, 2)
         
         refined_query = f"{user_query}. Previous error: {prev_message}"
-        refined = self.enhanced_agent.resolve_query(refined_query, rag_context)
+        refined = await self.enhanced_agent.aresolve_query(refined_query, rag_context)
+        # Refinement retries the SQL only; the original decomposition is kept
+        refined.pop("sub_queries", None)
+        
+        # A refinement that would produce the same SQL is bound to fail the same way:
+        # skip the retry and let the LLM explain the result instead
+        key = self._sql_spec_key(refined)
+        if key in (state.get("_last_refine_key"), self._sql_spec_key(state.get("query_analysis", {}))):
+            logger.info("Refined query is unchanged; skipping retry")
+            state["refine_exhausted"] = True
+            state["llm_fallback"] = True
+        state["_last_refine_key"] = key
         state["query_analysis"] = refined
-        state["refinement_count"] = state.get("refinement_count", 0) + 1
-        return self._ensure_flat_state(state, "refine_query")
+        state["refinement_count"] += 1
+        return state
 
-    def _node_format_response(self, state: Dict[str, Any]) -> Dict[str, Any]:
+    @staticmethod
+    def _sql_spec_key(analysis: Dict[str, Any]) -> int:
+        """Hash the parts of an analysis that determine the generated SQL"""
+        spec = {field: analysis.get(field) for field in (
+            "primary_table", "entities", "groupby", "filters", "aggregations", "orderby", "limit"
+        )}
+        return hash(json.dumps(spec, sort_keys=True, default=str))
+
+    async def _node_format_response(self, state: AgentState) -> AgentState:
         data = state.get("extracted_data", {})
         analysis = state.get("query_analysis", {})
-        llm_analysis = state.get("llm_analysis", "")
+        llm_analysis = state["llm_analysis"]
         logger.info("LangGraph: Formatting response...")
         
         # Use LLM insights as primary summary when available
@@ -357,14 +810,16 @@ class LangGraphQueryAgent:
         else:
             summary = state.get("validation_message", "No analysis available")
         
-        formatted = self.formatter.format_response(
+        # Chart rendering is CPU-bound; keep it off the event loop
+        formatted = await self._in_thread(
+            self.formatter.format_response,
             summary=summary,
-            data=data.get("data"),
+            data=self._frame(data),
             query_result=analysis,
             confidence=analysis.get("confidence_score", 0.5)
         )
         state["formatted_response"] = formatted
-        return self._ensure_flat_state(state, "format_response")
+        return state
 
     def _should_decompose(self, state: Dict[str, Any]) -> str:
         if state.get("decomposed"):
@@ -390,25 +845,27 @@ class LangGraphQueryAgent:
         
         for result in results:
             if result.get("success"):
-                data = result.get("data", [])
-                if hasattr(data, '__iter__') and not isinstance(data, str):
-                    if isinstance(data, pd.DataFrame):
-                        combined_data.append(data)
-                        total_rows += len(data)
-                    else:
-                        combined_data.extend(data)
-                        total_rows += len(data)
+                # processor.query always returns a DataFrame; row_count was taken when it ran
+                data = result.get("data")
+                if isinstance(data, pd.DataFrame):
+                    combined_data.append(data)
+                    total_rows += result["row_count"]
                 successful_queries += 1
             else:
                 errors.append(result.get("error", "Unknown error"))
         
-        # Merge DataFrames if possible
-        if combined_data and all(isinstance(d, pd.DataFrame) for d in combined_data):
+        # Merge DataFrames
+        if combined_data:
             try:
-                merged_df = pd.concat(combined_data, ignore_index=True)
+                # Empty frames add nothing but still cost a reindex; keep one so the columns survive
+                frames = [d for d in combined_data if not d.empty] or combined_data[:1]
+                if len(frames) == 1:
+                    merged_df = frames[0]
+                else:
+                    merged_df = pd.concat(frames, ignore_index=True, copy=False, sort=False)
                 return {
                     "data": merged_df,
-                    "row_count": len(merged_df),
+                    "row_count": total_rows,
                     "successful_queries": successful_queries,
                     "errors": errors
                 }
@@ -424,149 +881,203 @@ class LangGraphQueryAgent:
     
     def _quote_column(self, col: str) -> str:
         """Quote column name if it contains spaces or special characters"""
-        if ' ' in col or '-' in col or any(c in col for c in ['(', ')', '+', '*', '/']):
-            return f'"{col}"'
-        return col
+        return _quote_column(col)
     
-    def _apply_aggregation(self, agg: str, column: str, table: str) -> str:
-        """
-        Apply aggregation with smart type casting.
-        Only casts to DOUBLE if column is VARCHAR/TEXT - otherwise uses native type.
+    def _build_sql(self, analysis: Dict[str, Any]) -> Tuple[str, List[Any]]:
         """
-        quoted_col = self._quote_column(column)
-        agg_upper = agg.upper()
+        Build SQL from query specification with intelligent enhancements
         
-        # Check column type from schema
-        try:
-            schema = self.processor.get_table_schema(table)
-            col_type = schema.get(column, "").upper()
-        except Exception:
-            # If schema check fails, default to safe casting
-            col_type = "VARCHAR"
-        
-        # For numeric aggregations, only cast if column is text type
-        if agg_upper in ['SUM', 'AVG', 'MAX', 'MIN']:
-            # Check if column is stored as text
-            if 'VARCHAR' in col_type or 'STRING' in col_type or 'TEXT' in col_type:
-                return f"{agg_upper}(CAST({quoted_col} AS DOUBLE))"
-            else:
-                # Already numeric - no cast needed
-                return f"{agg_upper}({quoted_col})"
-        elif agg_upper == 'COUNT':
-            return f"COUNT({quoted_col})"
-        else:
-            return f"{agg_upper}({quoted_col})"
-    
-    def _build_sql(self, analysis: Dict[str, Any]) -> str:
-        """Build SQL from query specification with intelligent enhancements"""
+        Returns:
+            (sql, params) - filter values are bound as "?" parameters
+        """
         table = analysis.get("primary_table", "")
-        entities = analysis.get("entities", [])
-        groupby = analysis.get("groupby", [])
-        filters = analysis.get("filters", {})
         aggregations = analysis.get("aggregations", [])
-        orderby = analysis.get("orderby", {})
-        
-        select_clause = "*"
-        groupby_clause = ""
-        orderby_clause = ""
-        
-        # Detect if groupby is a date column for monthly/time-based trend
-        date_groupby = None
-        for col in groupby:
-            if col.lower() in ["date", "order date", "order_date", "transaction_date"]:
-                date_groupby = col
-                break
-        
-        if date_groupby:
-            # Use strftime with explicit CAST for date columns
-            quoted_date_col = self._quote_column(date_groupby)
-            month_expr = f"strftime('%Y-%m', CAST({quoted_date_col} AS DATE)) as month"
-            
-            # Build select with aggregations if specified
-            select_parts = [month_expr]
-            for entity in entities:
-                if entity != date_groupby and entity not in filters:
-                    if aggregations:
-                        # Apply aggregations to numeric columns with type casting
-                        for agg in aggregations:
-                            agg_expr = self._apply_aggregation(agg, entity, table)
-                            alias = f"{agg}_{entity.replace(' ', '_')}"
-                            select_parts.append(f"{agg_expr} as {alias}")
-                    else:
-                        quoted_entity = self._quote_column(entity)
-                        select_parts.append(quoted_entity)
-            
-            select_clause = ", ".join(select_parts)
-            groupby_clause = f" GROUP BY month"
-            orderby_clause = " ORDER BY month ASC"
-        else:
-            # Standard SQL building
-            select_parts = []
-            
-            # Always add GROUP BY columns first (required for SQL)
-            if groupby:
-                select_parts.extend([self._quote_column(col) for col in groupby])
-            
-            # Then add aggregations on entities
-            if entities and aggregations:
-                for entity in entities:
-                    # Only aggregate if entity is not in GROUP BY or FILTERS
-                    if entity not in groupby and entity not in filters:
-                        for agg in aggregations:
-                            agg_expr = self._apply_aggregation(agg, entity, table)
-                            alias = f"{agg}_{entity.replace(' ', '_')}"
-                            select_parts.append(f"{agg_expr} as {alias}")
-            elif entities:
-                # No aggregations, just select entities (exclude filter columns)
-                for entity in entities:
-                    if entity not in filters:
-                        quoted_entity = self._quote_column(entity)
-                        if quoted_entity not in select_parts:  # Avoid duplicates
-                            select_parts.append(quoted_entity)
-            
-            # Fallback to SELECT * if no parts specified
-            select_clause = ", ".join(select_parts) if select_parts else "*"
-            
-            if groupby:
-                quoted_groupby = [self._quote_column(col) for col in groupby]
-                groupby_clause = " GROUP BY " + ", ".join(quoted_groupby)
-            
-            if orderby:
-                order_parts = []
-                for col, direction in orderby.items():
-                    # If ordering by an aggregated column, use the alias
-                    if aggregations and col in entities and col not in groupby:
-                        # Use the aggregation alias (e.g., sum_GROSS_AMT)
-                        alias = f"{aggregations[0]}_{col.replace(' ', '_')}"
-                        order_parts.append(f"{alias} {direction}")
-                    else:
-                        # Use the quoted column name
-                        order_parts.append(f"{self._quote_column(col)} {direction}")
-                orderby_clause = " ORDER BY " + ", ".join(order_parts)
         
-        # Build final SQL
-        sql = f"SELECT {select_clause} FROM {table}"
+        # Column types only matter for aggregation casts; fetch the schema once, not per column
+        column_types = ()
+        if aggregations:
+            try:
+                column_types = tuple(self.processor.get_table_schema(table).items())
+            except Exception:
+                column_types = None
         
-        if filters:
-            where_conditions = [f"{self._quote_column(k)} = '{v}'" for k, v in filters.items()]
-            sql += " WHERE " + " AND ".join(where_conditions)
+        spec = (
+            table,
+            _freeze(analysis.get("entities", [])),
+            _freeze(analysis.get("groupby", [])),
+            _freeze(analysis.get("filters", {})),
+            _freeze(aggregations),
+            _freeze(analysis.get("orderby", {})),
+            analysis.get("limit", 100),
+            column_types
+        )
+        try:
+            sql, params = _build_sql_cached(*spec)
+        except TypeError:
+            # Unhashable value in the spec: build without the cache
+            sql, params = _build_sql_cached.__wrapped__(*spec)
         
-        sql += groupby_clause
-        sql += orderby_clause
+        logger.info(f"Built SQL: {sql} params={list(params)}")
+        return sql, list(params)
+
+    def process_query(
+        self,
+        user_query: str,
+        on_token: Optional[Callable[[str], None]] = None,
+        on_progress: Optional[Callable[[str], None]] = None
+    ) -> Dict[str, Any]:
+        """
+        Run the full workflow for a query (blocking wrapper around aprocess_query)
         
-        limit = analysis.get("limit", 100)
-        sql += f" LIMIT {limit}"
+        Args:
+            user_query: Natural language question
+            on_token: Optional callback receiving LLM analysis text chunks as they stream in
+            on_progress: Optional callback receiving each graph node's name as it completes
         
-        logger.info(f"Built SQL: {sql}")
-        return sql
+        Returns:
+            Result dict with query_resolution, extracted_data, formatted_response, confidence_score, success
+        """
+        return _run_sync(self.aprocess_query(user_query, on_token, on_progress))
 
-    def process_query(self, user_query: str) -> Dict[str, Any]:
-        initial_state = {"user_query": user_query, "refinement_count": 0}
-        final_state = self.graph.invoke(initial_state)
+    async def aprocess_query(
+        self,
+        user_query: str,
+        on_token: Optional[Callable[[str], None]] = None,
+        on_progress: Optional[Callable[[str], None]] = None
+    ) -> Dict[str, Any]:
+        """
+        Run the full workflow for a query without blocking the event loop
+        
+        Args:
+            user_query: Natural language question
+            on_token: Optional callback receiving LLM analysis text chunks as they stream in
+            on_progress: Optional callback receiving each graph node's name as it completes
         
+        Returns:
+            Same result dict as process_query
+        """
+        # sub_queries is deliberately absent: analyze_query decides it
+        initial_state: AgentState = {
+            "user_query": user_query,
+            "refinement_count": 0,
+            "needs_refine": False,
+            "refine_exhausted": False,
+            "llm_fallback": False,
+            "llm_analysis": ""
+        }
+        if on_token is None and on_progress is None:
+            final_state = await self.graph.ainvoke(initial_state, config=self._run_config)
+        else:
+            stream_mode = ["values"]
+            if on_token is not None:
+                stream_mode.append("messages")
+            if on_progress is not None:
+                stream_mode.append("updates")
+            final_state = initial_state
+            async for mode, payload in self.graph.astream(
+                initial_state,
+                config=self._run_config,
+                stream_mode=stream_mode
+            ):
+                if mode == "messages":
+                    chunk, metadata = payload
+                    if metadata.get("langgraph_node") == "llm_analysis" and chunk.content:
+                        on_token(chunk.content)
+                elif mode == "updates":
+                    for node_name in payload:
+                        on_progress(node_name)
+                else:
+                    final_state = payload
+        # Recording the turn embeds both messages; keep that off the event loop too
+        return await self._in_thread(self._finalize_result, user_query, final_state)
+
+    def process_queries(self, user_queries: List[str]) -> List[Dict[str, Any]]:
+        """
+        Answer several independent questions concurrently (blocking wrapper around aprocess_queries)
+        
+        Args:
+            user_queries: Natural language questions
+        
+        Returns:
+            One result dict per question, in input order
+        """
+        return _run_sync(self.aprocess_queries(user_queries))
+
+    async def aprocess_queries(
+        self,
+        user_queries: List[str],
+        max_concurrency: int = QUERY_BATCH_CONCURRENCY
+    ) -> List[Dict[str, Any]]:
+        """
+        Run the workflow for several questions at once, at most max_concurrency in flight
+        
+        A failing question yields an error result instead of cancelling the rest.
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def run_one(user_query: str) -> Dict[str, Any]:
+            async with semaphore:
+                return await self.aprocess_query(user_query)
+
+        results = await asyncio.gather(*(run_one(q) for q in user_queries), return_exceptions=True)
+        for idx, result in enumerate(results):
+            if isinstance(result, Exception):
+                logger.error(f"Batched query failed: {user_queries[idx][:50]}... ({result})")
+                results[idx] = {"user_query": user_queries[idx], "success": False, "error": str(result)}
+        return results
+
+    def process_query_events(self, user_query: str) -> Generator[Tuple[str, str], None, Dict[str, Any]]:
+        """
+        Run the workflow, yielding ("progress", node_name) as each node completes
+        and ("token", text) as LLM analysis text is generated
+        
+        Events are handed over on the caller's thread, so UI code (e.g. Streamlit
+        widgets) can react to them directly. The generator's return value
+        (StopIteration.value) is the same result dict process_query returns.
+        """
+        events = queue.Queue()
+        done = object()
+        future = asyncio.run_coroutine_threadsafe(
+            self.aprocess_query(
+                user_query,
+                on_token=lambda text: events.put(("token", text)),
+                on_progress=lambda node: events.put(("progress", node))
+            ),
+            _background_loop()
+        )
+        future.add_done_callback(lambda _: events.put(done))
+        while (event := events.get()) is not done:
+            yield event
+        return future.result()
+
+    def process_query_stream(self, user_query: str) -> Generator[str, None, Dict[str, Any]]:
+        """
+        Run the workflow, yielding LLM analysis text chunks as they are generated
+        
+        The generator's return value (StopIteration.value) is the same result dict
+        process_query returns. Nothing is yielded when the analysis is skipped or
+        served from cache; the summary is then only in the final result.
+        """
+        chunks = queue.Queue()
+        done = object()
+        future = asyncio.run_coroutine_threadsafe(
+            self.aprocess_query(user_query, on_token=chunks.put),
+            _background_loop()
+        )
+        future.add_done_callback(lambda _: chunks.put(done))
+        while (chunk := chunks.get()) is not done:
+            yield chunk
+        return future.result()
+
+    def _finalize_result(self, user_query: str, final_state: Dict[str, Any]) -> Dict[str, Any]:
+        """Record the turn in conversation memory and build the process_query result"""
         # Extract results
         query_analysis = final_state.get("query_analysis", {})
-        extracted_data = final_state.get("extracted_data", {})
+        extracted_data = dict(final_state.get("extracted_data", {}))
+        # Swap the frame handle back for the frame and release it
+        frame_id = extracted_data.pop("frame_id", None)
+        if frame_id:
+            extracted_data["data"] = self._frame_cache.pop(frame_id, None)
         formatted_response = final_state.get("formatted_response", {})
         confidence_score = query_analysis.get("confidence_score", 0.5)
         
@@ -13,61 +13,225 @@ except ImportError:
     from ..agents.multi_agent import MultiAgentOrchestrator
     USE_LANGGRAPH = False
 from ..utils.conversation_memory import ConversationMemory
+from ..utils.data_processor import get_processor
+from ..utils.config import QA_DEBUG
 import plotly.graph_objects as go
+import plotly.io as pio
+import bisect
+import json
 import logging
 import sys
+import threading
+
+# Optional import - orjson speeds up export and Plotly figure (de)serialization
+try:
+    import orjson
+    pio.json.config.default_engine = "orjson"
+except ImportError:
+    orjson = None
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, stream=sys.stdout)
 logger = logging.getLogger(__name__)
 
 
+# Progress shown once each LangGraph node completes: (percent, status of the next step)
+_NODE_STEPS = {
+    "analyze_query": (25, "⏳ Extracting data from database..."),
+    "decompose_query": (35, "⏳ Running sub-queries..."),
+    "extract_data": (55, "⏳ Validating results..."),
+    "refine_query": (45, "⏳ Retrying with a refined query..."),
+    "validate_results": (70, "⏳ Analyzing results with AI..."),
+    "llm_analysis": (85, "⏳ Formatting response..."),
+    "format_response": (100, "✅ Response ready"),
+}
+
+
+def _run_with_progress(orchestrator, query: str, progress_bar, status_text) -> dict:
+    """
+    Run a query, advancing the progress bar as the agent actually moves through its steps
+    
+    The LLM analysis is streamed into an assistant chat bubble as it is generated,
+    so the answer starts showing before the response is fully formatted.
+    """
+    status_text.text("⏳ Parsing query with AI...")
+    if not hasattr(orchestrator, "process_query_events"):
+        # The multi-agent pipeline has no step events
+        return orchestrator.process_query(query)
+    
+    stream_box = None
+    streamed = []
+    events = orchestrator.process_query_events(query)
+    while True:
+        try:
+            kind, value = next(events)
+        except StopIteration as stop:
+            return stop.value
+        if kind == "token":
+            if stream_box is None:
+                stream_box = st.chat_message("assistant").empty()
+            streamed.append(value)
+            stream_box.markdown("".join(streamed) + "▌")
+        elif value in _NODE_STEPS:
+            pct, label = _NODE_STEPS[value]
+            progress_bar.progress(pct)
+            status_text.text(label)
+
+
+_traced_errors = set()  # Error signatures whose traceback was already logged
+
+
+def _log_error(context: str, e: Exception):
+    """
+    Log a Q&A error as a single line
+    
+    With QA_DEBUG set, the traceback is also logged, but only the first time each
+    distinct error is seen, so a burst of identical failures doesn't flood the log.
+    """
+    signature = f"{type(e).__name__}: {e}"
+    if QA_DEBUG and signature not in _traced_errors:
+        if len(_traced_errors) >= 256:
+            _traced_errors.clear()
+        _traced_errors.add(signature)
+        logger.error(f"{context}: {signature}", exc_info=e)
+    else:
+        logger.error(f"{context}: {signature}")
+
+
+def _dump_export(export_data: dict) -> bytes:
+    """Serialize the conversation export to UTF-8 JSON, preferring orjson when installed"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(
+                export_data,
+                option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS,
+                default=str
+            )
+        except TypeError:
+            pass  # e.g. integers beyond 64 bits; stdlib handles them
+    return json.dumps(export_data, indent=2, default=str).encode()
+
+
+def _export_blob() -> bytes:
+    """Serialized conversation export, rebuilt only when the history has grown since the last export"""
+    history = st.session_state.qa_history
+    cached = st.session_state.get("_export_blob")
+    if cached is not None and cached[0] == len(history):
+        return cached[1]
+    
+    export_data = {
+        "messages": history,
+        "conversation_stats": {
+            "total_messages": len(history),
+            "memory_size": len(st.session_state.conversation_memory.messages)
+        }
+    }
+    blob = _dump_export(export_data)
+    st.session_state["_export_blob"] = (len(history), blob)
+    return blob
+
+
+@st.cache_resource(max_entries=128, show_spinner=False)
+def _parse_plotly_spec(spec_json: str) -> go.Figure:
+    """Rebuild a Plotly figure from its JSON spec (memoized across reruns; shared, so treat as read-only)"""
+    return pio.from_json(spec_json)
+
+
+def _queue_question():
+    """Move the typed question into the pending queue (button callback, runs before the rerun)"""
+    question = st.session_state.get("qa_input", "").strip()
+    if question:
+        st.session_state.setdefault("qa_pending", []).append(question)
+        st.session_state.qa_input = ""
+
+
+def _answer_queries(orchestrator, memory, queries: list, selected_table: str, progress_bar, status_text) -> list:
+    """
+    Answer questions from the query cache where possible and run the rest through the orchestrator
+    
+    A single uncached question reports live progress; several are answered concurrently.
+    
+    Returns:
+        List of (question, result, cached) tuples in input order
+    """
+    table_constraint = None if selected_table == "🌐 All Tables" else selected_table
+    
+    answers = []
+    misses = []
+    for query in queries:
+        # Cache key includes table context for accuracy
+        cached_result = memory.get_cached_query_result(f"{query}|table:{selected_table}")
+        if not cached_result:
+            misses.append(len(answers))
+        answers.append((query, cached_result, bool(cached_result)))
+    
+    if not misses:
+        status_text.text("📦 Retrieved from cache (instant response!)")
+        progress_bar.progress(100)
+        if len(answers) == 1:
+            st.success("🚀 **CACHE HIT!** - Retrieved instantly from cache (saved ~3 seconds)")
+        return answers
+    
+    # Add context to query if table is selected
+    enhanced = [
+        f"{answers[idx][0]} [CONTEXT: Search in {table_constraint} table only]" if table_constraint else answers[idx][0]
+        for idx in misses
+    ]
+    if len(enhanced) == 1:
+        results = [_run_with_progress(orchestrator, enhanced[0], progress_bar, status_text)]
+    else:
+        status_text.text(f"⏳ Answering {len(enhanced)} questions concurrently...")
+        results = orchestrator.process_queries(enhanced)
+    
+    for idx, result in zip(misses, results):
+        query = answers[idx][0]
+        # Store result in cache for future queries (use same cache key)
+        memory.cache_query_result(f"{query}|table:{selected_table}", result)
+        answers[idx] = (query, result, False)
+    return answers
+
+
+def _build_orchestrator(processor, memory):
+    """Create the Q&A engine for a session (LangGraph if available, otherwise multi-agent)"""
+    if USE_LANGGRAPH:
+        logger.info("Using LangGraph-based agent (supports complex queries)")
+        return LangGraphQueryAgent(processor=processor, conversation_memory=memory)
+    logger.info("Using basic multi-agent orchestrator")
+    return MultiAgentOrchestrator(processor=processor, conversation_memory=memory)
+
+
 def initialize_qa_session():
     """Initialize Q&A session state"""
+    # The orchestrator is created last, so its presence means the session is set up
+    if "qa_orchestrator" in st.session_state:
+        return
+    
     if "conversation_memory" not in st.session_state:
         st.session_state.conversation_memory = ConversationMemory()
     
     if "qa_history" not in st.session_state:
         st.session_state.qa_history = []
     
-    if "qa_orchestrator" not in st.session_state:
-        from data_processor import get_processor
-        processor = st.session_state.get("processor")
-        if processor is None:
-            processor = get_processor()
-        
-        # Use LangGraph if available, otherwise fall back to multi-agent
-        if USE_LANGGRAPH:
-            logger.info("Using LangGraph-based agent (supports complex queries)")
-            st.session_state.qa_orchestrator = LangGraphQueryAgent(
-                processor=processor,
-                conversation_memory=st.session_state.conversation_memory
-            )
-            st.session_state.use_langgraph = True
-        else:
-            logger.info("Using basic multi-agent orchestrator")
-            st.session_state.qa_orchestrator = MultiAgentOrchestrator(
-                processor=processor,
-                conversation_memory=st.session_state.conversation_memory
-            )
-            st.session_state.use_langgraph = False
+    processor = st.session_state.get("processor") or get_processor()
+    st.session_state.qa_orchestrator = _build_orchestrator(processor, st.session_state.conversation_memory)
+    st.session_state.use_langgraph = USE_LANGGRAPH
+    
+    # Warm caches while the user is still typing (no st.* calls in there)
+    threading.Thread(target=st.session_state.qa_orchestrator.warmup, name="qa-warmup", daemon=True).start()
+
+
+# Confidence bands (level, color, message); a score at or above _CONF_THRESHOLDS[i] falls in band i + 1
+_CONF_THRESHOLDS = (0.65, 0.85)
+_CONF_BANDS = (
+    ("🔴 Low Confidence", "#e74c3c", "Answer may be inaccurate, please review or rephrase query"),
+    ("🟡 Medium Confidence", "#f39c12", "Answer is reasonable but may need verification"),
+    ("🟢 High Confidence", "#2ecc71", "Answer is well-understood and reliable"),
+)
 
 
 def display_confidence_indicator(confidence: float):
     """Display confidence score with visual indicator"""
-    
-    if confidence >= 0.85:
-        level = "🟢 High Confidence"
-        color = "#2ecc71"
-        message = "Answer is well-understood and reliable"
-    elif confidence >= 0.65:
-        level = "🟡 Medium Confidence"
-        color = "#f39c12"
-        message = "Answer is reasonable but may need verification"
-    else:
-        level = "🔴 Low Confidence"
-        color = "#e74c3c"
-        message = "Answer may be inaccurate, please review or rephrase query"
+    level, color, message = _CONF_BANDS[bisect.bisect_right(_CONF_THRESHOLDS, confidence)]
     
     col1, col2 = st.columns([1, 3])
     with col1:
@@ -77,35 +241,105 @@ def display_confidence_indicator(confidence: float):
         st.caption(message)
 
 
-def display_data_table(data: Optional[pd.DataFrame], max_rows: int = 10):
-    """Display data table with formatting"""
+_CHAT_WINDOW = 20  # Chat messages rendered per page of history
+
+
+def _grow_chat_window():
+    """Show one more page of older chat messages (button callback)"""
+    st.session_state.qa_window_size = st.session_state.get("qa_window_size", _CHAT_WINDOW) + _CHAT_WINDOW
+
+
+def _render_chat_message(message: dict):
+    """Render one chat history entry with a fixed, small number of elements"""
+    role = message.get("role", "user")
+    content = message.get("content", "")
+    confidence = message.get("confidence", 0)
+    table_source = message.get("table_source", "")
+    
+    if role == "user":
+        with st.chat_message("user"):
+            st.write(content)
+            if table_source and table_source != "🌐 All Tables":
+                st.caption(f"📁 Source: {table_source}")
+        return
+    
+    with st.chat_message("assistant"):
+        # Display response summary
+        if isinstance(content, dict):
+            st.write(content.get("summary", content))
+        else:
+            st.write(content)
+        
+        # Table source, cache indicator and confidence share one caption;
+        # the full confidence indicator is shown once, under Response Analysis
+        caption_parts = []
+        if table_source:
+            caption_parts.append(f"📁 Queried: {table_source}")
+        if message.get("cached", False):
+            caption_parts.append("📦 Cached response")
+        if confidence > 0:
+            level = _CONF_BANDS[bisect.bisect_right(_CONF_THRESHOLDS, confidence)][0]
+            caption_parts.append(f"{level} ({confidence:.2f})")
+        if caption_parts:
+            st.caption(" • ".join(caption_parts))
+
+
+def display_data_table(data: Optional[pd.DataFrame], max_rows: int = 10, key: str = "qa_data_page"):
+    """Display data table with formatting, one page of rows at a time"""
     if data is None or data.empty:
         st.info("No data to display")
         return
     
-    st.subheader(f"Data Summary ({len(data)} rows)")
+    total_rows = len(data)
+    st.subheader(f"Data Summary ({total_rows} rows)")
     
-    # Display key statistics
-    numeric_cols = data.select_dtypes(include=['number']).columns.tolist()
-    if numeric_cols:
+    # Display key statistics (counted from dtypes, without building a numeric sub-frame)
+    numeric_count = int(data.dtypes.map(pd.api.types.is_numeric_dtype).sum())
+    if numeric_count:
         col1, col2, col3 = st.columns(3)
         with col1:
-            st.metric("Total Rows", len(data))
+            st.metric("Total Rows", total_rows)
         with col2:
             st.metric("Columns", len(data.columns))
         with col3:
-            if len(numeric_cols) > 0:
-                st.metric("Numeric Columns", len(numeric_cols))
+            st.metric("Numeric Columns", numeric_count)
+    
+    # Only the visible page is sent to the browser
+    total_pages = -(-total_rows // max_rows)
+    page = 1
+    if total_pages > 1:
+        page = int(st.number_input("Page", min_value=1, max_value=total_pages, value=1, step=1, key=key))
+    start = (page - 1) * max_rows
+    end = min(start + max_rows, total_rows)
     
-    # Display table
-    st.dataframe(
-        data.head(max_rows),
-        use_container_width=True,
-        height=400
-    )
+    # iloc slicing avoids head()'s copy; the page's own height sizes the grid
+    st.dataframe(data.iloc[start:end], use_container_width=True)
     
-    if len(data) > max_rows:
-        st.caption(f"Showing {max_rows} of {len(data)} rows")
+    if total_pages > 1:
+        st.caption(f"Showing rows {start + 1}-{end} of {total_rows}")
+
+
+_CHART_TYPES = frozenset({"line_chart", "bar_chart", "histogram", "box_plot", "heatmap"})
+_CHART_CONFIG = {"displayModeBar": False}
+
+
+def _build_figure(viz: dict):
+    """
+    Turn a chart visualization's spec into a Plotly figure
+    
+    Args:
+        viz: Visualization dict from the response formatter
+        
+    Returns:
+        Plotly figure, or None when the spec is missing or unusable
+    """
+    spec = viz.get("spec")
+    if isinstance(spec, dict):
+        # Figure dicts need no JSON round-trip
+        return go.Figure(spec)
+    if isinstance(spec, str):
+        return _parse_plotly_spec(spec)
+    return None
 
 
 def display_visualizations(visualizations: list):
@@ -115,9 +349,20 @@ def display_visualizations(visualizations: list):
     
     st.subheader("📊 Visualizations")
     
+    # Parse every chart spec up front so rendering below is a straight placement pass
+    prepared = []
+    for viz in visualizations[:4]:  # Limit to 4 charts
+        fig, error = None, None
+        if viz.get("type") in _CHART_TYPES:
+            try:
+                fig = _build_figure(viz)
+            except Exception as e:
+                error = e
+        prepared.append((viz, fig, error))
+    
     # Display visualizations in a grid
     cols = st.columns(2)
-    for idx, viz in enumerate(visualizations[:4]):  # Limit to 4 charts
+    for idx, (viz, fig, error) in enumerate(prepared):
         with cols[idx % 2]:
             try:
                 viz_type = viz.get("type", "unknown")
@@ -125,20 +370,18 @@ def display_visualizations(visualizations: list):
                 
                 st.markdown(f"**{title}**")
                 
+                if error is not None:
+                    raise error
+                
                 if viz_type == "table":
                     # Display table data
                     viz_df = pd.DataFrame(viz.get("data", []))
                     st.dataframe(viz_df, use_container_width=True)
                 
-                elif viz_type in ["line_chart", "bar_chart", "histogram", "box_plot", "heatmap"]:
-                    # Display Plotly chart
-                    import plotly.io as pio
-                    import json
-                    
-                    spec_json = viz.get("spec")
-                    if isinstance(spec_json, str):
-                        fig = pio.from_json(spec_json)
-                        st.plotly_chart(fig, use_container_width=True)
+                elif viz_type in _CHART_TYPES:
+                    # Plotly's own template, no modebar: less client-side work per chart
+                    if fig is not None:
+                        st.plotly_chart(fig, use_container_width=True, theme=None, config=_CHART_CONFIG)
                     else:
                         st.warning(f"Could not display {viz_type}")
                 
@@ -149,6 +392,11 @@ def display_visualizations(visualizations: list):
                 st.warning(f"Could not display visualization: {str(e)}")
 
 
+def _use_followup(followup: str):
+    """Put a suggested follow-up into the question box (button callback, runs before the rerun)"""
+    st.session_state.qa_input = followup
+
+
 def display_suggested_followups(followups: list):
     """Display suggested follow-up questions"""
     if not followups:
@@ -159,9 +407,8 @@ def display_suggested_followups(followups: list):
     cols = st.columns(len(followups))
     for idx, followup in enumerate(followups[:3]):  # Limit to 3 suggestions
         with cols[idx]:
-            if st.button(followup, key=f"followup_{idx}", use_container_width=True):
-                st.session_state.qa_followup = followup
-                st.rerun()
+            st.button(followup, key=f"followup_{idx}", use_container_width=True,
+                      on_click=_use_followup, args=(followup,))
 
 
 def display_conversation_context():
@@ -172,22 +419,21 @@ def display_conversation_context():
         return
     
     with st.expander("📜 Conversation Memory", expanded=False):
+        message_count, topic_count, avg_confidence = memory.stats()
         col1, col2, col3 = st.columns(3)
         
         with col1:
-            st.metric("Messages", len(memory.messages))
+            st.metric("Messages", message_count)
         with col2:
-            st.metric("Topics", len(set([m.get("metadata", {}).get("query_type") for m in memory.messages])))
+            st.metric("Topics", topic_count)
         with col3:
-            avg_confidence = sum([m.get("metadata", {}).get("confidence", 0.5) for m in memory.messages]) / max(len(memory.messages), 1)
             st.metric("Avg Confidence", f"{avg_confidence:.2f}")
         
         st.markdown("---")
         st.write("**Recent Messages:**")
         
         # Display recent messages
-        recent = memory.messages[-6:]  # Last 6 messages
-        for msg in recent:
+        for msg in memory.tail(6):  # Last 6 messages
             role = msg.get("role", "unknown").upper()
             content = msg.get("content", "")[:100]  # Truncate
             confidence = msg.get("metadata", {}).get("confidence", 0)
@@ -198,93 +444,32 @@ def display_conversation_context():
                 st.write(f"🤖 **Assistant:** {content}... *(confidence: {confidence:.2f})*")
 
 
-def render_qa_tab():
-    """Main Q&A tab renderer"""
-    
+# st.fragment (Streamlit >= 1.37) or its experimental predecessor; plain function otherwise
+_fragment = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None) or (lambda func: func)
+
+
+def _rerun_chat():
+    """Rerun only the chat fragment when supported, otherwise the whole app"""
+    if hasattr(st, "fragment"):
+        st.rerun(scope="fragment")
+    else:
+        st.rerun()
+
+
+def _report_fatal_error(e: Exception):
+    """Log and show an unrecoverable Q&A tab error"""
+    _log_error("Q&A TAB FATAL ERROR", e)
+    st.error(f"❌ Q&A system encountered an error: {str(e)}")
+    st.info("Please refresh the page and try again.")
+
+
+@_fragment
+def _chat_fragment():
+    """Chat history, question input and last-response details"""
     try:
-        # Initialize session
-        initialize_qa_session()
-        
-        st.header("💬 Advanced Q&A with Conversation Memory")
-        
-        # Table selection section
-        st.subheader("📁 Data Source Selection")
-        col1, col2 = st.columns([2, 1])
-        
-        with col1:
-            processor = st.session_state.get("processor")
-            available_tables = processor.list_tables() if processor else []
-            
-            # Create options with "All Tables" as default
-            table_options = ["🌐 All Tables"] + available_tables
-            
-            if "qa_selected_table" not in st.session_state:
-                st.session_state.qa_selected_table = "🌐 All Tables"
-            
-            selected_table = st.selectbox(
-                "Select a CSV file to query (or search all):",
-                table_options,
-                index=table_options.index(st.session_state.qa_selected_table) if st.session_state.qa_selected_table in table_options else 0,
-                key="qa_table_select"
-            )
-            st.session_state.qa_selected_table = selected_table
-        
-        with col2:
-            if selected_table != "🌐 All Tables":
-                st.info(f"🎯 Searching: **{selected_table}** only")
-                
-                # Add data cleaning option with button
-                st.markdown("---")
-                st.markdown("**🧹 Data Quality Options:**")
-                
-                col_btn1, col_btn2 = st.columns(2)
-                with col_btn1:
-                    if st.button("📊 View Table Stats", key="view_stats_btn", use_container_width=True):
-                        stats = st.session_state.data_processor.get_table_stats(selected_table)
-                        st.write(f"**Rows:** {stats.get('row_count', 'N/A')}")
-                        st.write(f"**Columns:** {stats.get('column_count', 'N/A')}")
-                
-                with col_btn2:
-                    if st.button("🧹 Apply Strict Clean", key="strict_clean_btn", use_container_width=True, 
-                                help="Remove rows with >80% null values"):
-                        with st.spinner(f"Re-cleaning {selected_table}..."):
-                            success = st.session_state.data_processor.reclean_table(selected_table, strict=True)
-                            if success:
-                                st.success(f"✅ Cleaned!")
-                                st.rerun()
-                            else:
-                                st.error("❌ Failed")
-            else:
-                st.info(f"🌐 Searching: **All {len(available_tables)}** files")
-        
-        # Display system info
-        with st.expander("ℹ️ System Information", expanded=False):
-            col1, col2, col3, col4 = st.columns(4)
-            with col1:
-                st.metric("Conversation Messages", len(st.session_state.conversation_memory.messages))
-            with col2:
-                st.metric("Chat History", len(st.session_state.qa_history))
-            with col3:
-                cache_size = len(st.session_state.conversation_memory.query_cache)
-                st.metric("Cached Queries", cache_size)
-            with col4:
-                st.metric("Memory Enabled", "✅" if st.session_state.conversation_memory else "❌")
-            
-            # Data quality info
-            if selected_table != "🌐 All Tables":
-                st.divider()
-                st.caption("🧹 **Data Quality:**")
-                st.caption("• All uploaded files are automatically cleaned (empty rows, duplicate headers, summary rows removed)")
-                st.caption("• Enable 'Strict Cleaning' above to remove rows with >80% null values")
-                st.caption("• Text columns with numeric values are automatically converted to numbers")
-            
-            if cache_size > 0:
-                st.caption("💡 Repeated queries are served from cache for instant responses (5 min TTL)")
-        
-        # Display conversation context
-        display_conversation_context()
-        
-        st.divider()
+        success_message = st.session_state.pop("_last_query_success", None)
+        if success_message:
+            st.toast(success_message)
         
         # Chat display area
         st.subheader("Chat History")
@@ -295,74 +480,71 @@ def render_qa_tab():
             if not st.session_state.qa_history:
                 st.info("No messages yet. Start by asking a question about the sales data!")
             else:
-                for message in st.session_state.qa_history:
-                    role = message.get("role", "user")
-                    content = message.get("content", "")
-                    confidence = message.get("confidence", 0)
-                    table_source = message.get("table_source", "")
-                    cached = message.get("cached", False)  # Check if from cache
-                    
-                    if role == "user":
-                        with st.chat_message("user"):
-                            st.write(content)
-                            if table_source and table_source != "🌐 All Tables":
-                                st.caption(f"📁 Source: {table_source}")
-                    else:
-                        with st.chat_message("assistant"):
-                            # Display response summary
-                            if isinstance(content, dict):
-                                st.write(content.get("summary", content))
-                            else:
-                                st.write(content)
-                            
-                            # Show cache indicator and table source
-                            caption_parts = []
-                            if table_source:
-                                caption_parts.append(f"📁 Queried: {table_source}")
-                            if cached:
-                                caption_parts.append("📦 Cached response")
-                            if caption_parts:
-                                st.caption(" • ".join(caption_parts))
-                            
-                            # Display confidence if available
-                            if confidence > 0:
-                                display_confidence_indicator(confidence)
+                # Only the newest messages are rendered; older ones load on request
+                history = st.session_state.qa_history
+                window = st.session_state.setdefault("qa_window_size", _CHAT_WINDOW)
+                hidden = len(history) - window
+                if hidden > 0:
+                    st.button(f"⬆️ Load {min(hidden, _CHAT_WINDOW)} older messages", key="qa_load_older",
+                              on_click=_grow_chat_window)
+                for message in history[max(hidden, 0):]:
+                    _render_chat_message(message)
         
         # Input section
         st.divider()
         st.subheader("Ask a Question")
         
-        # Check for followup question in session state
-        if hasattr(st.session_state, 'qa_followup') and st.session_state.qa_followup:
-            user_input = st.session_state.qa_followup
-            st.session_state.qa_followup = None
-        else:
+        # Typing doesn't rerun anything; the question is only read when the form is submitted
+        with st.form("qa_form"):
             user_input = st.text_area(
                 "Enter your question about the retail sales data:",
                 placeholder="E.g., What were total sales in Q4? Which product had highest growth? Show me regional trends.",
                 height=80,
                 key="qa_input"
             )
+            
+            col1, col2, col3 = st.columns([3, 1, 1])
+            col2.form_submit_button("Queue ➕", use_container_width=True, on_click=_queue_question,
+                                    help="Add this question to the queue; Send answers all queued questions concurrently")
+            send_button = col3.form_submit_button("Send 📤", use_container_width=True)
         
-        col1, col2, col3, col4 = st.columns([2, 1, 1, 1])
-        
-        send_button = col2.button("Send 📤", use_container_width=True, key="send_btn")
-        clear_button = col3.button("Clear 🗑️", use_container_width=True, key="clear_btn")
-        export_button = col4.button("Export 📥", use_container_width=True, key="export_btn")
+        col1, col2, col3 = st.columns([3, 1, 1])
+        clear_button = col2.button("Clear 🗑️", use_container_width=True, key="clear_btn")
+        export_button = col3.button("Export 📥", use_container_width=True, key="export_btn")
         
         # Show cache info with more details
         cache_size = len(st.session_state.conversation_memory.query_cache)
         if cache_size > 0:
             st.caption(f"💡 {cache_size} query result(s) cached for instant retrieval (5 min TTL)")
             with st.expander("🔍 View Cached Queries", expanded=False):
-                for idx, (cache_key, cache_data) in enumerate(st.session_state.conversation_memory.query_cache.items()):
-                    query_preview = cache_key[:60] + "..." if len(cache_key) > 60 else cache_key
-                    timestamp = cache_data.get("timestamp", "Unknown")
-                    st.text(f"{idx+1}. {query_preview} (cached at {timestamp[-8:]})")
+                # Keys are digests; the query text is kept alongside the result
+                entries = list(st.session_state.conversation_memory.query_cache.values())
+                start = 0
+                if len(entries) > 50:
+                    total_pages = -(-len(entries) // 20)
+                    page = int(st.number_input("Page", min_value=1, max_value=total_pages, value=1, step=1, key="qa_cache_page"))
+                    start = (page - 1) * 20
+                    entries = entries[start:start + 20]
+                
+                # One code block instead of one element per cached entry
+                lines = []
+                for idx, cache_data in enumerate(entries, start=start + 1):
+                    query = cache_data.get("query", "")
+                    query_preview = query[:60] + "..." if len(query) > 60 else query
+                    cached_at = cache_data.get("cached_at", "Unknown")
+                    lines.append(f"{idx}. {query_preview} (cached at {cached_at})")
+                st.code("\n".join(lines), language=None)
 
         
+        pending = st.session_state.get("qa_pending", [])
+        if pending:
+            st.caption(f"🗂️ {len(pending)} question(s) queued; Send answers them together")
+        
         if send_button:
-            if user_input.strip():
+            queries = pending + ([user_input] if user_input.strip() else [])
+            if queries:
+                st.session_state.qa_pending = []
+                
                 # Create detailed progress container
                 progress_container = st.container()
                 
@@ -373,159 +555,100 @@ def render_qa_tab():
                     try:
                         # Get selected table constraint
                         selected_table = st.session_state.qa_selected_table
-                        table_constraint = None if selected_table == "🌐 All Tables" else selected_table
-                        
-                        # Process query
-                        orchestrator = st.session_state.qa_orchestrator
-                        
-                        # Add context to query if table is selected
-                        if table_constraint:
-                            enhanced_query = f"{user_input} [CONTEXT: Search in {table_constraint} table only]"
-                        else:
-                            enhanced_query = user_input
-                        
-                        # Create cache key that includes table context for accuracy
-                        cache_key = f"{user_input}|table:{selected_table}"
                         
-                        # Check cache FIRST for faster responses
-                        memory = st.session_state.conversation_memory
-                        cached_result = memory.get_cached_query_result(cache_key)
+                        # Cache hits are served instantly; the rest go to the orchestrator
+                        answers = _answer_queries(
+                            st.session_state.qa_orchestrator,
+                            st.session_state.conversation_memory,
+                            queries,
+                            selected_table,
+                            progress_bar,
+                            status_text
+                        )
                         
-                        # Debug logging
-                        logger.info(f"Cache lookup for: {cache_key[:80]}...")
-                        logger.info(f"Current cache size: {len(memory.query_cache)} entries")
-                        logger.info(f"Cache keys: {list(memory.query_cache.keys())[:3]}")
-                        
-                        if cached_result:
-                            # Cache hit! Return immediately
-                            status_text.text("📦 Retrieved from cache (instant response!)")
-                            progress_bar.progress(100)
-                            result = cached_result
-                            logger.info(f"✅ CACHE HIT for query: {user_input[:50]}...")
-                            
-                            # Show prominent cache hit message
-                            st.success("🚀 **CACHE HIT!** - Retrieved instantly from cache (saved ~3 seconds)")
-                        else:
-                            # Cache miss - process normally
-                            logger.info(f"❌ CACHE MISS - Processing query...")
+                        answered = 0
+                        errors = []
+                        for query, result, cached in answers:
+                            # Verify result is a dictionary
+                            if not isinstance(result, dict):
+                                raise ValueError(f"Invalid result type: {type(result)}")
                             
-                            # Step 1: Query Resolution
-                            status_text.text("⏳ Step 1/4: Parsing query with AI...")
-                            progress_bar.progress(15)
+                            # Check if query processing was successful
+                            if result.get("error"):
+                                errors.append(result.get("error"))
+                                continue
                             
-                            # Step 2: Data Extraction
-                            status_text.text("⏳ Step 2/4: Extracting data from database...")
-                            progress_bar.progress(40)
+                            # Add user message
+                            st.session_state.qa_history.append({
+                                "role": "user",
+                                "content": query,
+                                "confidence": 1.0,
+                                "table_source": selected_table
+                            })
                             
-                            # Step 3: Validation
-                            status_text.text("⏳ Step 3/4: Validating results...")
-                            progress_bar.progress(65)
+                            # Extract response data
+                            formatted_response = result.get("formatted_response", {})
+                            confidence = result.get("confidence_score", 0.5)
                             
-                            result = orchestrator.process_query(enhanced_query)
+                            # Validate formatted response
+                            if not isinstance(formatted_response, dict):
+                                formatted_response = {"summary": str(formatted_response)}
                             
-                            # Store result in cache for future queries (use same cache key)
-                            memory.cache_query_result(cache_key, result)
-                            logger.info(f"✅ CACHED result for query: {user_input[:50]}...")
-                            logger.info(f"Cache now has {len(memory.query_cache)} entries")
-                        
-                        # Verify result is a dictionary
-                        if not isinstance(result, dict):
-                            raise ValueError(f"Invalid result type: {type(result)}")
-                        
-                        # Step 4: Formatting
-                        status_text.text("⏳ Step 4/4: Formatting response...")
-                        progress_bar.progress(90)
+                            # Add assistant message with cache indicator
+                            st.session_state.qa_history.append({
+                                "role": "assistant",
+                                "content": formatted_response,
+                                "confidence": confidence,
+                                "full_result": result,
+                                "table_source": selected_table,
+                                "cached": cached  # Flag if from cache
+                            })
+                            answered += 1
                         
-                        # Check if query processing was successful
-                        if result.get("error"):
+                        if errors:
+                            # Keep the errors on screen; answered questions show up on the next rerun
                             progress_container.empty()
-                            st.error(f"❌ Query Error: {result.get('error')}")
+                            for error in errors:
+                                st.error(f"❌ Query Error: {error}")
+                            if answered:
+                                st.caption(f"{answered} other question(s) were answered and added to the chat")
                             return
                         
-                        # Add user message
-                        st.session_state.qa_history.append({
-                            "role": "user",
-                            "content": user_input,
-                            "confidence": 1.0,
-                            "table_source": selected_table
-                        })
-                        
-                        # Extract response data
-                        formatted_response = result.get("formatted_response", {})
-                        confidence = result.get("confidence_score", 0.5)
-                        
-                        # Validate formatted response
-                        if not isinstance(formatted_response, dict):
-                            formatted_response = {"summary": str(formatted_response)}
-                        
-                        # Add assistant message with cache indicator
-                        st.session_state.qa_history.append({
-                            "role": "assistant",
-                            "content": formatted_response,
-                            "confidence": confidence,
-                            "full_result": result,
-                            "table_source": selected_table,
-                            "cached": cached_result is not None  # Flag if from cache
-                        })
-                        
-                        # Complete
-                        progress_bar.progress(100)
-                        if cached_result:
-                            status_text.text("✅ Query retrieved from cache (instant response)!")
+                        # Complete: confirm with a toast on the next run instead of lingering here
+                        if all(cached for _, _, cached in answers):
+                            st.session_state._last_query_success = "✅ Query retrieved from cache (instant response)!"
                         else:
-                            status_text.text("✅ Query processed and cached successfully!")
-                        import time
-                        time.sleep(0.5)
+                            st.session_state._last_query_success = "✅ Query processed and cached successfully!"
                         progress_container.empty()
-                        st.rerun()
+                        _rerun_chat()
                     
                     except Exception as e:
                         progress_container.empty()
                         error_msg = f"Error processing query: {str(e)}"
-                        print(f"Q&A CRASH: {error_msg}")  # Log to console
-                        import traceback
-                        traceback.print_exc()  # Print full stack trace
+                        _log_error("Q&A query failed", e)
                         st.error(f"❌ {error_msg}")
                         st.info("Please try rephrasing your question or select a different table.")
             else:
                 st.warning("Please enter a question")
         
         if clear_button:
-            from data_processor import get_processor
             cache_count = len(st.session_state.conversation_memory.query_cache)
             st.session_state.qa_history = []
-            st.session_state.conversation_memory = ConversationMemory()
-            processor = st.session_state.get("processor") or get_processor()
-            
-            if USE_LANGGRAPH:
-                st.session_state.qa_orchestrator = LangGraphQueryAgent(
-                    processor=processor,
-                    conversation_memory=st.session_state.conversation_memory
-                )
-            else:
-                st.session_state.qa_orchestrator = MultiAgentOrchestrator(
-                    processor=processor,
-                    conversation_memory=st.session_state.conversation_memory
-                )
+            st.session_state.qa_pending = []
+            st.session_state.qa_window_size = _CHAT_WINDOW
+            st.session_state.pop("_export_blob", None)
+            # Reset in place: keeps the loaded embedding model, LLM clients and compiled graph
+            st.session_state.conversation_memory.clear()
+            st.session_state.conversation_memory.clear_cache()
+            st.session_state.qa_orchestrator.reset(st.session_state.conversation_memory)
             st.success(f"✅ Conversation cleared (removed {cache_count} cached queries)")
             st.rerun()
         
         if export_button:
-            # Export conversation to JSON
-            export_data = {
-                "messages": st.session_state.qa_history,
-                "conversation_stats": {
-                    "total_messages": len(st.session_state.qa_history),
-                    "memory_size": len(st.session_state.conversation_memory.messages)
-                }
-            }
-            
-            import json
-            export_json = json.dumps(export_data, indent=2, default=str)
-            
+            # Export conversation to JSON (serialized only on request, reused until the history changes)
             st.download_button(
                 label="Download Conversation",
-                data=export_json,
+                data=_export_blob(),
                 file_name="qa_conversation.json",
                 mime="application/json"
             )
@@ -537,7 +660,10 @@ def render_qa_tab():
             full_result = last_response.get("full_result")
             
             st.divider()
-            st.subheader("📊 Response Analysis")
+            col1, col2 = st.columns([3, 1])
+            col1.subheader("📊 Response Analysis")
+            # Data table and charts are the costly part of a rerun; let the user switch them off
+            show_details = col2.toggle("Data & charts", value=True, key="qa_show_analysis")
             
             # Confidence indicator
             display_confidence_indicator(confidence)
@@ -549,17 +675,18 @@ def render_qa_tab():
                 extracted_data = full_result.get("extracted_data", {})
                 formatted_response = full_result.get("formatted_response", {})
                 
-                # Display data table
-                data = extracted_data.get("data")
-                if data is not None and not data.empty:
-                    display_data_table(data)
-                    st.divider()
-                
-                # Display visualizations
-                visualizations = formatted_response.get("visualizations", [])
-                if visualizations:
-                    display_visualizations(visualizations)
-                    st.divider()
+                if show_details:
+                    # Display data table
+                    data = extracted_data.get("data")
+                    if data is not None and not data.empty:
+                        display_data_table(data)
+                        st.divider()
+                    
+                    # Display visualizations
+                    visualizations = formatted_response.get("visualizations", [])
+                    if visualizations:
+                        display_visualizations(visualizations)
+                        st.divider()
                 
                 # Display suggested follow-ups
                 followups = formatted_response.get("suggested_followups", [])
@@ -567,12 +694,107 @@ def render_qa_tab():
                     display_suggested_followups(followups)
     
     except Exception as e:
-        logger.error(f"Q&A TAB FATAL ERROR: {str(e)}", exc_info=True)
-        print(f"Q&A TAB CRASH: {str(e)}")
-        import traceback
-        traceback.print_exc()
-        st.error(f"❌ Q&A system encountered an error: {str(e)}")
-        st.info("Please refresh the page and try again.")
+        _report_fatal_error(e)
+
+
+def render_qa_tab():
+    """Main Q&A tab renderer"""
+    
+    try:
+        # Initialize session
+        initialize_qa_session()
+        
+        st.header("💬 Advanced Q&A with Conversation Memory")
+        
+        # Table selection section
+        st.subheader("📁 Data Source Selection")
+        col1, col2 = st.columns([2, 1])
+        
+        with col1:
+            processor = st.session_state.get("processor")
+            available_tables = processor.list_tables() if processor else []
+            
+            # Create options with "All Tables" as default; rebuilt only when the tables change
+            if st.session_state.get("_qa_table_source") != available_tables:
+                st.session_state._qa_table_source = available_tables
+                st.session_state._qa_table_options = ["🌐 All Tables", *available_tables]
+                st.session_state._qa_table_index = {
+                    table: idx for idx, table in enumerate(st.session_state._qa_table_options)
+                }
+            
+            if "qa_selected_table" not in st.session_state:
+                st.session_state.qa_selected_table = "🌐 All Tables"
+            
+            selected_table = st.selectbox(
+                "Select a CSV file to query (or search all):",
+                st.session_state._qa_table_options,
+                index=st.session_state._qa_table_index.get(st.session_state.qa_selected_table, 0),
+                key="qa_table_select"
+            )
+            st.session_state.qa_selected_table = selected_table
+        
+        with col2:
+            if selected_table != "🌐 All Tables":
+                st.info(f"🎯 Searching: **{selected_table}** only")
+                
+                # Add data cleaning option with button
+                st.markdown("---")
+                st.markdown("**🧹 Data Quality Options:**")
+                
+                col_btn1, col_btn2 = st.columns(2)
+                with col_btn1:
+                    if st.button("📊 View Table Stats", key="view_stats_btn", use_container_width=True):
+                        stats = st.session_state.data_processor.get_table_stats(selected_table)
+                        st.write(f"**Rows:** {stats.get('row_count', 'N/A')}")
+                        st.write(f"**Columns:** {stats.get('column_count', 'N/A')}")
+                
+                with col_btn2:
+                    if st.button("🧹 Apply Strict Clean", key="strict_clean_btn", use_container_width=True, 
+                                help="Remove rows with >80% null values"):
+                        with st.spinner(f"Re-cleaning {selected_table}..."):
+                            success = st.session_state.data_processor.reclean_table(selected_table, strict=True)
+                            if success:
+                                st.success(f"✅ Cleaned!")
+                                st.rerun()
+                            else:
+                                st.error("❌ Failed")
+            else:
+                st.info(f"🌐 Searching: **All {len(available_tables)}** files")
+        
+        # Display system info
+        with st.expander("ℹ️ System Information", expanded=False):
+            col1, col2, col3, col4 = st.columns(4)
+            with col1:
+                st.metric("Conversation Messages", len(st.session_state.conversation_memory.messages))
+            with col2:
+                st.metric("Chat History", len(st.session_state.qa_history))
+            with col3:
+                cache_size = len(st.session_state.conversation_memory.query_cache)
+                st.metric("Cached Queries", cache_size)
+            with col4:
+                st.metric("Memory Enabled", "✅" if st.session_state.conversation_memory else "❌")
+            
+            # Data quality info
+            if selected_table != "🌐 All Tables":
+                st.divider()
+                st.caption("🧹 **Data Quality:**")
+                st.caption("• All uploaded files are automatically cleaned (empty rows, duplicate headers, summary rows removed)")
+                st.caption("• Enable 'Strict Cleaning' above to remove rows with >80% null values")
+                st.caption("• Text columns with numeric values are automatically converted to numbers")
+            
+            if cache_size > 0:
+                st.caption("💡 Repeated queries are served from cache for instant responses (5 min TTL)")
+        
+        # Display conversation context
+        display_conversation_context()
+        
+        st.divider()
+        
+        # Chat, input and response details rerun on their own
+        _chat_fragment()
+    
+    except Exception as e:
+        _report_fatal_error(e)
 
 
 if __name__ == "__main__":
@@ -19,7 +19,7 @@ except ImportError:
     ConversationMemory = None
     _has_conversation_memory = False
 
-from .response_formatter import ResponseFormatter
+from .response_formatter import ResponseFormatter, get_formatter
 from .input_loader import infer_table_name, load_dataframe_from_bytes, parse_text_summary
 
 # Optional import - requires reportlab
@@ -31,6 +31,7 @@ except ImportError:
     _has_pdf_generator = False
 
 from .prompt_loader import PromptLoader, get_prompt_loader, load_prompt, format_prompt
+from .llm_cache import LLMCache
 
 __all__ = [
     # Config
@@ -45,8 +46,10 @@ __all__ = [
     "get_processor",
     # Memory & Context
     "ConversationMemory",
+    "LLMCache",
     # Formatters
     "ResponseFormatter",
+    "get_formatter",
     "infer_table_name",
     "load_dataframe_from_bytes",
     "parse_text_summary",
@@ -24,11 +24,20 @@ SUPPORTED_CSV_FILES = [
 # Agent Configuration
 AGENT_TIMEOUT = 30
 MAX_ITERATIONS = 10
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))  # Parallel requests per LLM batch
+AGENT_WORKERS = int(os.getenv("AGENT_WORKERS", "16"))  # Worker threads for blocking agent work (SQL, embeddings, charts)
+QUERY_BATCH_CONCURRENCY = int(os.getenv("QUERY_BATCH_CONCURRENCY", "4"))  # Queued user questions answered at once
 
 # Embedding Configuration
 EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+EMBEDDING_THREADS = int(os.getenv("EMBEDDING_THREADS", "0"))  # torch CPU threads for encoding (0 = torch default)
+EMBEDDING_MAX_SEQ_LENGTH = int(os.getenv("EMBEDDING_MAX_SEQ_LENGTH", "128"))  # Token cap per encoded chat message
+
+# Data Cleaning Configuration
+CLEAN_ENGINE = os.getenv("CLEAN_ENGINE", "pandas")  # Text cleaning passes: "pandas" or "polars" (optional dependency)
 
 # Streamlit Configuration
 PAGE_TITLE = "Retail Insights Assistant"
 PAGE_LAYOUT = "wide"
 INITIAL_SIDEBAR_STATE = "expanded"
+QA_DEBUG = os.getenv("QA_DEBUG", "").lower() in ("1", "true", "yes")  # Log full tracebacks for Q&A errors
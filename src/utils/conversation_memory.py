@@ -3,19 +3,60 @@ Conversation Memory & Context Manager
 Maintains conversation history with RAG and semantic search capabilities
 """
 
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple, Deque
+from collections import Counter, OrderedDict, deque
+from itertools import islice
 import json
 from datetime import datetime
+from functools import lru_cache
 import numpy as np
 from sentence_transformers import SentenceTransformer
 import faiss
 import logging
 import hashlib
+import threading
+import time
+
+# Optional import - bounded, self-expiring query cache
+try:
+    from cachetools import TTLCache
+except ImportError:
+    TTLCache = None
+
+# Optional import - faster history export
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from .config import EMBEDDING_THREADS, EMBEDDING_MAX_SEQ_LENGTH
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+@lru_cache(maxsize=4)
+def _load_embedding_model(model_name: str) -> SentenceTransformer:
+    """Load a sentence transformer once per process; every memory instance shares it"""
+    if EMBEDDING_THREADS > 0:
+        try:
+            import torch
+            torch.set_num_threads(EMBEDDING_THREADS)
+        except ImportError:
+            pass
+    model = SentenceTransformer(model_name)
+    model.eval()
+    # Chat messages are short; a lower cap trims padding work on every batch
+    model.max_seq_length = min(model.max_seq_length or EMBEDDING_MAX_SEQ_LENGTH, EMBEDDING_MAX_SEQ_LENGTH)
+    return model
+
+
+@lru_cache(maxsize=512)
+def _query_key(query: str) -> str:
+    """Case-insensitive 16-byte blake2b key; memoized since each query is looked up, then stored"""
+    return hashlib.blake2b(query.lower().encode(), digest_size=16).hexdigest()
+
+
 class ConversationMemory:
     """
     Manages conversation history with vector embeddings for semantic search
@@ -23,6 +64,12 @@ class ConversationMemory:
     Includes query result caching for performance
     """
     
+    QUERY_CACHE_SIZE = 256  # Max cached query results
+    QUERY_CACHE_TTL = 300  # Seconds a cached result stays valid
+    QUERY_CACHE_SWEEP = 32  # Inserts between expiry sweeps of the fallback cache
+    MAX_MESSAGES = 200  # Oldest messages (and their embeddings) are dropped beyond this
+    QUERY_EMBEDDING_CACHE_SIZE = 256  # Recent search-query embeddings kept for repeats
+    
     def __init__(self, model_name: str = "all-MiniLM-L6-v2"):
         """
         Initialize conversation memory with sentence transformer
@@ -30,20 +77,41 @@ class ConversationMemory:
         Args:
             model_name: Sentence transformer model for embeddings
         """
-        self.messages: List[Dict[str, Any]] = []
-        self.embeddings: List[np.ndarray] = []
-        self.index: Optional[faiss.IndexFlatL2] = None
-        self.query_cache: Dict[str, Any] = {}  # Cache for query results
+        self.messages: Deque[Dict[str, Any]] = deque(maxlen=self.MAX_MESSAGES)
+        self.embeddings: Deque[np.ndarray] = deque(maxlen=self.MAX_MESSAGES)
+        self.index: Optional[faiss.IndexFlatIP] = None
+        # Messages awaiting embedding; encoded in one batch on the next similarity search
+        self._pending: Deque[str] = deque(maxlen=self.MAX_MESSAGES)
+        self._embed_lock = threading.RLock()
+        # Unit-norm (1, dim) embeddings of recent search queries, LRU by cache key
+        self._query_embeddings: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        # Cache for query results (without cachetools: an OrderedDict kept as an LRU,
+        # with expired entries swept every QUERY_CACHE_SWEEP inserts)
+        if TTLCache is not None:
+            self.query_cache = TTLCache(maxsize=self.QUERY_CACHE_SIZE, ttl=self.QUERY_CACHE_TTL)
+        else:
+            self.query_cache: Dict[str, Any] = OrderedDict()
+        self._cache_inserts = 0
+        
+        # Running aggregates, kept current by add_message so the UI needn't rescan history
+        self.confidence_sum = 0.0
+        self._topics = Counter()
+        self._role_counts = Counter()  # Messages per role
+        self._role_chars = Counter()  # Total content length per role
         
         # Load embedding model
         try:
-            self.embedding_model = SentenceTransformer(model_name)
+            self.embedding_model = _load_embedding_model(model_name)
             self.embedding_dim = self.embedding_model.get_sentence_embedding_dimension()
             logger.info(f"Loaded embedding model: {model_name} (dim: {self.embedding_dim})")
         except Exception as e:
             logger.error(f"Failed to load embedding model: {e}")
             self.embedding_model = None
             self.embedding_dim = 384
+        
+        # Built once and grown one vector per message; clear() empties it in place
+        if self.embedding_model:
+            self.index = faiss.IndexFlatIP(self.embedding_dim)
     
     def add_message(self, role: str, content: str, metadata: Optional[Dict] = None):
         """
@@ -61,29 +129,108 @@ class ConversationMemory:
             "metadata": metadata or {}
         }
         
-        self.messages.append(message)
+        # One lock for the whole update: concurrent writers (batched queries finalize on
+        # several threads) must not retire the same message twice, and _pending must be
+        # queued in deque order so FAISS row ids keep matching message positions
+        with self._embed_lock:
+            if len(self.messages) == self.MAX_MESSAGES:
+                # Retire the message the deque is about to drop from the running aggregates
+                oldest = self.messages[0]
+                self._role_counts[oldest["role"]] -= 1
+                self._role_chars[oldest["role"]] -= len(oldest["content"])
+                evicted = oldest["metadata"]
+                self.confidence_sum -= evicted.get("confidence", 0.5)
+                topic = evicted.get("query_type")
+                self._topics[topic] -= 1
+                if not self._topics[topic]:
+                    del self._topics[topic]
+            
+            self.messages.append(message)
+            self._role_counts[role] += 1
+            self._role_chars[role] += len(content)
+            self.confidence_sum += message["metadata"].get("confidence", 0.5)
+            self._topics[message["metadata"].get("query_type")] += 1
+            
+            # Queue for semantic search; encoding is deferred and batched
+            if self.embedding_model:
+                self._pending.append(content)
+    
+    def flush_embeddings(self, query: Optional[str] = None, batch_size: int = 32) -> Optional[np.ndarray]:
+        """
+        Encode all pending messages in one batch and add them to the index
         
-        # Create embedding for semantic search
-        if self.embedding_model:
+        Args:
+            query: Optional search text encoded in the same batch
+            batch_size: SentenceTransformer encode batch size
+            
+        Returns:
+            The query's (1, dim) embedding when a query was given, else None
+        """
+        with self._embed_lock:
+            # Repeated queries reuse their embedding instead of running the model again
+            query_key = query_vector = None
+            if query is not None:
+                query_key = self.get_query_cache_key(query)
+                query_vector = self._query_embeddings.get(query_key)
+                if query_vector is not None:
+                    self._query_embeddings.move_to_end(query_key)
+            
+            texts = list(self._pending)
+            encode_query = query is not None and query_vector is None
+            if encode_query:
+                texts.append(query)
+            if not texts or not self.embedding_model:
+                return query_vector
+            
             try:
-                embedding = self.embedding_model.encode([content])[0].astype(np.float32)
-                self.embeddings.append(embedding)
-                
-                # Initialize or update FAISS index
-                self._update_index()
+                vectors = np.asarray(
+                    self.embedding_model.encode(
+                        texts, batch_size=batch_size, convert_to_numpy=True, normalize_embeddings=True
+                    ),
+                    dtype=np.float32
+                )
             except Exception as e:
-                logger.warning(f"Failed to create embedding: {e}")
+                # Leave the messages pending: dropping them would leave the index shorter than
+                # self.messages and shift every later search hit onto the wrong message
+                logger.warning(f"Failed to create embeddings: {e}")
+                return None
+            # Cleared only now; add_message queues under this same lock, so nothing arrived meanwhile
+            self._pending.clear()
+            
+            if encode_query:
+                vectors, query_vector = vectors[:-1], vectors[-1:]
+                self._query_embeddings[query_key] = query_vector
+                if len(self._query_embeddings) > self.QUERY_EMBEDDING_CACHE_SIZE:
+                    self._query_embeddings.popitem(last=False)
+            if len(vectors):
+                # The index holds the float32 copy used for search; the backup for rebuilds can be half-size
+                self.embeddings.extend(vectors.astype(np.float16))
+                self._append_to_index(vectors)
+            return query_vector
+    
+    def _append_to_index(self, vectors: np.ndarray):
+        """Add a (B, dim) batch to the FAISS index, dropping the oldest beyond MAX_MESSAGES"""
+        try:
+            if self.index is None:
+                self.index = faiss.IndexFlatIP(self.embedding_dim)
+            overflow = min(self.index.ntotal + len(vectors) - self.MAX_MESSAGES, self.index.ntotal)
+            if overflow > 0:
+                # Flat-index ids are positions, so removing the lowest ids keeps them in step with the deques
+                self.index.remove_ids(np.arange(overflow, dtype=np.int64))
+            self.index.add(vectors[-self.MAX_MESSAGES:])
+        except Exception as e:
+            logger.warning(f"Incremental FAISS update failed, rebuilding: {e}")
+            self._update_index()
     
     def _update_index(self):
-        """Update FAISS index with current embeddings"""
-        if not self.embeddings:
-            self.index = None
-            return
-        
+        """Rebuild the FAISS index from all current embeddings (recovery path only)"""
         try:
-            embeddings_array = np.array(self.embeddings).astype(np.float32)
-            self.index = faiss.IndexFlatL2(self.embedding_dim)
-            self.index.add(embeddings_array)
+            if self.index is None:
+                self.index = faiss.IndexFlatIP(self.embedding_dim)
+            else:
+                self.index.reset()
+            if self.embeddings:
+                self.index.add(np.vstack(self.embeddings).astype(np.float32))
         except Exception as e:
             logger.warning(f"Failed to update FAISS index: {e}")
     
@@ -98,22 +245,27 @@ class ConversationMemory:
         Returns:
             List of similar messages with relevance scores
         """
-        if not self.index or not self.embedding_model:
+        if not self.embedding_model:
             return []
         
         try:
-            # Encode query
-            query_embedding = self.embedding_model.encode([query])[0].astype(np.float32)
-            query_embedding = np.array([query_embedding])
-            
-            # Search similar messages
-            distances, indices = self.index.search(query_embedding, min(k, len(self.messages)))
+            with self._embed_lock:
+                if not self._pending and (self.index is None or not self.index.ntotal):
+                    return []
+                # Encode query together with any messages still waiting for embeddings
+                query_embedding = self.flush_embeddings(query)
+                if query_embedding is None or self.index is None or not self.index.ntotal:
+                    return []
+                
+                # Search similar messages
+                # Inner product of unit vectors is the cosine similarity
+                scores, indices = self.index.search(query_embedding, min(k, self.index.ntotal))
             
             similar_messages = []
-            for idx, distance in zip(indices[0], distances[0]):
+            for idx, score in zip(indices[0], scores[0]):
                 if idx >= 0 and idx < len(self.messages):
                     msg = self.messages[idx].copy()
-                    msg["similarity_score"] = float(1 / (1 + distance))  # Convert distance to similarity
+                    msg["similarity_score"] = float(score)
                     similar_messages.append(msg)
             
             return similar_messages
@@ -131,7 +283,7 @@ class ConversationMemory:
         Returns:
             Formatted conversation context
         """
-        context_messages = self.messages[-window_size:]
+        context_messages = self.tail(window_size)
         
         if not context_messages:
             return "No previous conversation history."
@@ -144,6 +296,32 @@ class ConversationMemory:
         
         return context
     
+    def tail(self, k: int) -> List[Dict[str, Any]]:
+        """
+        Get the last k messages without copying the whole history
+        
+        Args:
+            k: Number of recent messages to return
+            
+        Returns:
+            List of message dicts, oldest first
+        """
+        if k <= 0:
+            return []
+        return list(islice(self.messages, max(0, len(self.messages) - k), None))
+    
+    def recent(self, k: int = 8) -> List[Tuple[str, str]]:
+        """
+        Get the last k messages as lightweight (role, content) pairs
+        
+        Args:
+            k: Number of recent messages to return
+            
+        Returns:
+            List of (role, content) tuples, oldest first
+        """
+        return [(msg["role"], msg["content"]) for msg in self.tail(k)]
+    
     def build_rag_context(self, query: str, k: int = 3) -> str:
         """
         Build RAG (Retrieval-Augmented Generation) context
@@ -179,39 +357,71 @@ class ConversationMemory:
         Returns:
             Summary with message counts, topics, etc.
         """
-        user_msgs = [m for m in self.messages if m["role"] == "user"]
-        assistant_msgs = [m for m in self.messages if m["role"] == "assistant"]
+        # Counts and lengths come from the running per-role aggregates kept by add_message
+        user_count = self._role_counts["user"]
+        assistant_count = self._role_counts["assistant"]
         
         return {
             "total_messages": len(self.messages),
-            "user_messages": len(user_msgs),
-            "assistant_messages": len(assistant_msgs),
+            "user_messages": user_count,
+            "assistant_messages": assistant_count,
             "start_time": self.messages[0]["timestamp"] if self.messages else None,
             "last_message_time": self.messages[-1]["timestamp"] if self.messages else None,
-            "average_user_msg_length": np.mean([len(m["content"]) for m in user_msgs]) if user_msgs else 0,
-            "average_assistant_msg_length": np.mean([len(m["content"]) for m in assistant_msgs]) if assistant_msgs else 0,
+            "average_user_msg_length": self._role_chars["user"] / user_count if user_count else 0,
+            "average_assistant_msg_length": self._role_chars["assistant"] / assistant_count if assistant_count else 0,
         }
     
     def clear(self):
         """Clear all conversation history"""
         self.messages.clear()
-        self.embeddings.clear()
-        self.index = None
+        with self._embed_lock:
+            self._pending.clear()
+            self.embeddings.clear()
+            if self.index is not None:
+                self.index.reset()
+        self.confidence_sum = 0.0
+        self._topics.clear()
+        self._role_counts.clear()
+        self._role_chars.clear()
         logger.info("Conversation memory cleared")
     
     def export_history(self, filepath: str):
         """Export conversation history to JSON"""
         try:
             data = {
-                "messages": self.messages,
+                "messages": list(self.messages),
                 "summary": self.get_conversation_summary()
             }
-            with open(filepath, "w") as f:
-                json.dump(data, f, indent=2)
+            if orjson is not None:
+                with open(filepath, "wb") as f:
+                    f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY))
+            else:
+                with open(filepath, "w") as f:
+                    json.dump(data, f, indent=2)
             logger.info(f"Conversation exported to {filepath}")
         except Exception as e:
             logger.error(f"Export failed: {e}")
     
+    @property
+    def message_count(self) -> int:
+        """Number of messages in memory"""
+        return len(self.messages)
+    
+    @property
+    def topic_count(self) -> int:
+        """Number of distinct query types in memory (None counts as one)"""
+        return len(self._topics)
+    
+    def stats(self) -> Tuple[int, int, float]:
+        """
+        Get headline memory statistics from the running aggregates (O(1))
+        
+        Returns:
+            (message count, distinct topic count, average confidence)
+        """
+        count = len(self.messages)
+        return count, len(self._topics), self.confidence_sum / max(count, 1)
+    
     def __len__(self) -> int:
         """Return number of messages in memory"""
         return len(self.messages)
@@ -220,42 +430,54 @@ class ConversationMemory:
         return f"ConversationMemory(messages={len(self.messages)}, embeddings={len(self.embeddings)})"
     
     def get_query_cache_key(self, query: str) -> str:
-        """Generate cache key from query"""
-        return hashlib.md5(query.lower().encode()).hexdigest()
+        """Generate a fixed-size cache key from query (16-byte blake2b digest)"""
+        return _query_key(query)
     
     def cache_query_result(self, query: str, result: Any) -> None:
         """Cache query result for repeated queries"""
         cache_key = self.get_query_cache_key(query)
         self.query_cache[cache_key] = {
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": time.monotonic(),  # For the TTL check; immune to wall-clock changes
+            "cached_at": datetime.now().strftime("%H:%M:%S"),  # For display only
             "result": result,
             "query": query[:100]  # Store query preview for debugging
         }
-        logger.info(f"✅ CACHED result for query: {query[:50]}...")
-        logger.info(f"   Cache key: {cache_key}")
-        logger.info(f"   Cache now has {len(self.query_cache)} entries")
+        if isinstance(self.query_cache, OrderedDict):
+            self._bound_fallback_cache(cache_key)
+        logger.debug("Cached result for query %.50s (%d entries)", query, len(self.query_cache))
     
     def get_cached_query_result(self, query: str) -> Optional[Any]:
         """Get cached result if available (within 5 minutes)"""
         cache_key = self.get_query_cache_key(query)
-        logger.info(f"🔍 Looking up cache key: {cache_key}")
-        logger.info(f"   For query: {query[:50]}...")
-        logger.info(f"   Available cache keys: {list(self.query_cache.keys())}")
         
-        if cache_key in self.query_cache:
-            cached = self.query_cache[cache_key]
-            cache_time = datetime.fromisoformat(cached["timestamp"])
-            age_minutes = (datetime.now() - cache_time).total_seconds() / 60
+        # Single get: a TTLCache entry may expire between a membership test and the read
+        cached = self.query_cache.get(cache_key)
+        if cached is not None:
+            age = time.monotonic() - cached["timestamp"]
             
-            if age_minutes < 5:  # Cache valid for 5 minutes
-                logger.info(f"✅ CACHE HIT! Using cached result (age: {age_minutes:.1f}min)")
+            if age < self.QUERY_CACHE_TTL:  # Cache valid for 5 minutes
+                logger.debug("Query cache hit (age: %.0fs)", age)
+                if isinstance(self.query_cache, OrderedDict):
+                    self.query_cache.move_to_end(cache_key)
                 return cached["result"]
             else:
-                logger.info(f"❌ Cache expired (age: {age_minutes:.1f}min)")
+                logger.debug("Query cache entry expired (age: %.0fs)", age)
         else:
-            logger.info(f"❌ CACHE MISS - Key not found")
+            logger.debug("Query cache miss")
         return None
     
+    def _bound_fallback_cache(self, cache_key: str) -> None:
+        """Keep the OrderedDict fallback cache an LRU of QUERY_CACHE_SIZE, sweeping expired entries periodically"""
+        self.query_cache.move_to_end(cache_key)
+        while len(self.query_cache) > self.QUERY_CACHE_SIZE:
+            self.query_cache.popitem(last=False)
+        
+        self._cache_inserts += 1
+        if self._cache_inserts % self.QUERY_CACHE_SWEEP == 0:
+            cutoff = time.monotonic() - self.QUERY_CACHE_TTL
+            for key in [k for k, v in self.query_cache.items() if v["timestamp"] < cutoff]:
+                del self.query_cache[key]
+    
     def clear_cache(self) -> None:
         """Clear query cache"""
         self.query_cache.clear()
@@ -5,6 +5,8 @@ Handles CSV loading, data validation, and SQL query execution for the Retail Ins
 """
 
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import duckdb
 import pandas as pd
 from typing import List, Dict, Any, Optional
@@ -16,6 +18,19 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+# DuckDB type-name fragments used to classify columns
+NUMERIC_TYPES = frozenset({"BIGINT", "INTEGER", "SMALLINT", "TINYINT", "DOUBLE", "FLOAT", "DECIMAL"})
+TEXT_TYPES = frozenset({"VARCHAR", "STRING", "TEXT"})
+
+# Parallel file loads in load_all_csvs
+LOAD_WORKERS = min(8, os.cpu_count() or 1)
+
+
+def _quote_ident(name: str) -> str:
+    """Quote a table name for use in DuckDB SQL."""
+    return '"' + name.replace('"', '""') + '"'
+
+
 class DataProcessor:
     """
     DuckDB-based data processor for handling retail sales data.
@@ -36,9 +51,14 @@ class DataProcessor:
         """
         self.db_path = db_path
         self.conn = None
+        # A DuckDB connection is not safe for concurrent use; agents fan out across threads
+        self._lock = threading.RLock()
         self._initialize_connection()
         self.loaded_tables = []
         self._loaded_directories = set()  # Track loaded directories to avoid reloading
+        self._schema_map: Optional[Dict[str, List[str]]] = None  # {table: columns}, rebuilt after loads
+        self._tables: Optional[List[str]] = None  # Table names, rebuilt after loads
+        self.schema_version = 0  # Bumped whenever tables are loaded, replaced or re-cleaned
     
     def _initialize_connection(self):
         """Initialize DuckDB connection."""
@@ -49,6 +69,14 @@ class DataProcessor:
             logger.error(f"Failed to initialize DuckDB: {e}")
             raise
     
+    def _drop_relation(self, table_name: str):
+        """Remove a table or registered DataFrame view of this name, if any (caller holds the lock)."""
+        try:
+            self.conn.unregister(table_name)
+        except Exception:
+            pass
+        self.conn.execute(f"DROP TABLE IF EXISTS {_quote_ident(table_name)}")
+    
     def load_csv(self, file_path: str, table_name: Optional[str] = None) -> bool:
         """
         Load a CSV file into DuckDB.
@@ -70,13 +98,41 @@ class DataProcessor:
             if table_name is None:
                 table_name = Path(file_path).stem.replace(" ", "_").replace("-", "_")
             
-            # Read CSV and register with DuckDB
-            df = pd.read_csv(file_path)
-            self.conn.register(table_name, df)
-            if table_name not in self.loaded_tables:
-                self.loaded_tables.append(table_name)
+            with self._lock:
+                self._drop_relation(table_name)
+            
+            # DuckDB's native reader parses straight into columnar storage
+            # (parallel, no pandas intermediate). It runs on a cursor - its own
+            # connection to the same database - so several files can load at once
+            # without holding the shared connection's lock.
+            quoted_path = str(file_path).replace("'", "''")
+            try:
+                cursor = self.conn.cursor()
+                try:
+                    cursor.execute(
+                        f"CREATE TABLE {_quote_ident(table_name)} AS SELECT * FROM read_csv_auto('{quoted_path}')"
+                    )
+                    row_count = cursor.execute(f"SELECT COUNT(*) FROM {_quote_ident(table_name)}").fetchone()[0]
+                    column_count = len(cursor.table(table_name).columns)
+                finally:
+                    cursor.close()
+                df = None
+            except duckdb.Error as e:
+                # pandas fallback; registered views are per-connection, so this goes on the shared one
+                logger.warning(f"DuckDB CSV reader failed for {file_path}, using pandas: {e}")
+                df = pd.read_csv(file_path)
+                row_count, column_count = len(df), len(df.columns)
+            
+            with self._lock:
+                if df is not None:
+                    self.conn.register(table_name, df)
+                self._schema_map = None
+                self._tables = None
+                self.schema_version += 1
+                if table_name not in self.loaded_tables:
+                    self.loaded_tables.append(table_name)
             
-            logger.info(f"Loaded {table_name}: {len(df)} rows, {len(df.columns)} columns")
+            logger.info(f"Loaded {table_name}: {row_count} rows, {column_count} columns")
             return True
             
         except Exception as e:
@@ -94,7 +150,12 @@ class DataProcessor:
                 logger.warning(f"Loaded file {file_name} is empty")
                 return False
 
-            self.conn.register(table_name, df)
+            with self._lock:
+                self._drop_relation(table_name)
+                self.conn.register(table_name, df)
+                self._schema_map = None
+                self._tables = None
+                self.schema_version += 1
             if table_name not in self.loaded_tables:
                 self.loaded_tables.append(table_name)
 
@@ -145,26 +206,35 @@ class DataProcessor:
         csv_files = list(Path(directory).glob("*.csv"))
         logger.info(f"Found {len(csv_files)} CSV files in {directory}")
         
-        for csv_file in csv_files:
-            results[csv_file.name] = self.load_csv(str(csv_file))
+        # Files load concurrently; DuckDB's reader releases the GIL while parsing
+        if csv_files:
+            workers = min(LOAD_WORKERS, len(csv_files))
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="csv-load") as pool:
+                statuses = pool.map(self.load_csv, [str(csv_file) for csv_file in csv_files])
+                results = {csv_file.name: status for csv_file, status in zip(csv_files, statuses)}
         
         # Mark directory as loaded
         self._loaded_directories.add(directory)
         
         return results
     
-    def query(self, sql: str) -> pd.DataFrame:
+    def query(self, sql: str, params: Optional[List[Any]] = None) -> pd.DataFrame:
         """
         Execute SQL query and return results as DataFrame.
         
         Args:
-            sql: SQL query string
+            sql: SQL query string, optionally with "?" placeholders
+            params: Values bound to the placeholders, in order
             
         Returns:
             Pandas DataFrame with query results
         """
         try:
-            result = self.conn.execute(sql).fetch_df()
+            with self._lock:
+                if params:
+                    result = self.conn.execute(sql, params).fetch_df()
+                else:
+                    result = self.conn.execute(sql).fetch_df()
             logger.info(f"Query executed successfully: {len(result)} rows returned")
             return result
         except Exception as e:
@@ -182,40 +252,43 @@ class DataProcessor:
             Dictionary mapping column names to data types
         """
         try:
-            result = self.conn.execute(f"DESCRIBE {table_name}").fetchall()
+            with self._lock:
+                result = self.conn.execute(f"DESCRIBE {table_name}").fetchall()
             schema = {row[0]: row[1] for row in result}
             return schema
         except Exception as e:
             logger.error(f"Failed to get schema for {table_name}: {e}")
             return {}
     
-    def get_numeric_columns(self, table_name: str) -> List[str]:
+    def get_numeric_columns(self, table_name: str, schema: Optional[Dict[str, str]] = None) -> List[str]:
         """
         Get list of numeric columns in a table.
         
         Args:
             table_name: Name of the table
+            schema: Already-fetched schema, to skip another DESCRIBE
             
         Returns:
             List of numeric column names
         """
-        schema = self.get_table_schema(table_name)
-        numeric_types = {"BIGINT", "INTEGER", "SMALLINT", "TINYINT", "DOUBLE", "FLOAT", "DECIMAL"}
-        return [col for col, dtype in schema.items() if any(nt in dtype for nt in numeric_types)]
+        if schema is None:
+            schema = self.get_table_schema(table_name)
+        return [col for col, dtype in schema.items() if any(nt in dtype for nt in NUMERIC_TYPES)]
     
-    def get_text_columns(self, table_name: str) -> List[str]:
+    def get_text_columns(self, table_name: str, schema: Optional[Dict[str, str]] = None) -> List[str]:
         """
         Get list of text columns in a table.
         
         Args:
             table_name: Name of the table
+            schema: Already-fetched schema, to skip another DESCRIBE
             
         Returns:
             List of text column names
         """
-        schema = self.get_table_schema(table_name)
-        text_types = {"VARCHAR", "STRING", "TEXT"}
-        return [col for col, dtype in schema.items() if any(tt in dtype for tt in text_types)]
+        if schema is None:
+            schema = self.get_table_schema(table_name)
+        return [col for col, dtype in schema.items() if any(tt in dtype for tt in TEXT_TYPES)]
     
     def get_table_stats(self, table_name: str) -> Dict[str, Any]:
         """
@@ -228,15 +301,16 @@ class DataProcessor:
             Dictionary with row count and column information
         """
         try:
-            row_count = self.conn.execute(f"SELECT COUNT(*) FROM {table_name}").fetchone()[0]
+            with self._lock:
+                row_count = self.conn.execute(f"SELECT COUNT(*) FROM {table_name}").fetchone()[0]
             schema = self.get_table_schema(table_name)
             
             stats = {
                 "row_count": row_count,
                 "column_count": len(schema),
                 "columns": schema,
-                "numeric_columns": self.get_numeric_columns(table_name),
-                "text_columns": self.get_text_columns(table_name),
+                "numeric_columns": self.get_numeric_columns(table_name, schema),
+                "text_columns": self.get_text_columns(table_name, schema),
             }
             return stats
         except Exception as e:
@@ -260,15 +334,20 @@ class DataProcessor:
                 return False
             
             # Extract current data
-            df = self.conn.execute(f"SELECT * FROM {table_name}").fetch_df()
+            with self._lock:
+                df = self.conn.execute(f"SELECT * FROM {table_name}").fetch_df()
             original_rows = len(df)
             
             # Apply cleaning
             df_cleaned = clean_dataframe(df, strict=strict)
             
             # Re-register the cleaned table
-            self.conn.unregister(table_name)
-            self.conn.register(table_name, df_cleaned)
+            with self._lock:
+                self._drop_relation(table_name)
+                self.conn.register(table_name, df_cleaned)
+                self._schema_map = None
+                self._tables = None
+                self.schema_version += 1
             
             logger.info(f"Re-cleaned {table_name}: {original_rows} → {len(df_cleaned)} rows")
             return True
@@ -281,13 +360,18 @@ class DataProcessor:
         """
         Get list of all loaded tables.
         
+        Cached alongside the schema map, so UI reruns and prompt building
+        do not query the DuckDB catalog each time.
+        
         Returns:
             List of table names
         """
         try:
-            result = self.conn.execute("SELECT table_name FROM information_schema.tables WHERE table_schema='main'").fetchall()
-            tables = [row[0] for row in result]
-            return tables
+            with self._lock:
+                if self._tables is None:
+                    result = self.conn.execute("SELECT table_name FROM information_schema.tables WHERE table_schema='main'").fetchall()
+                    self._tables = [row[0] for row in result]
+                return list(self._tables)
         except Exception as e:
             logger.error(f"Failed to list tables: {e}")
             return []
@@ -303,13 +387,38 @@ class DataProcessor:
             List of column names
         """
         try:
-            result = self.conn.execute(f"PRAGMA table_info({table_name})").fetchall()
+            with self._lock:
+                result = self.conn.execute(f"PRAGMA table_info({table_name})").fetchall()
             columns = [row[1] for row in result]  # row[1] is the column name in PRAGMA output
             return columns
         except Exception as e:
             logger.error(f"Failed to get columns for table {table_name}: {e}")
             return []
     
+    def get_schema_map(self) -> Dict[str, List[str]]:
+        """
+        Get the columns of every loaded table.
+        
+        Cached until the next load or re-clean, so repeated schema lookups
+        do not hit the DuckDB catalog.
+        
+        Returns:
+            Dictionary mapping table names to column lists
+        """
+        with self._lock:
+            if self._schema_map is None:
+                self._schema_map = {
+                    table: self.get_table_columns(table) for table in self.list_tables()
+                }
+            return {table: list(columns) for table, columns in self._schema_map.items()}
+    
+    def clear_schema_cache(self):
+        """Drop the cached schema map and table list (call after registering tables directly on conn)."""
+        with self._lock:
+            self._schema_map = None
+            self._tables = None
+            self.schema_version += 1
+    
     def get_sample_data(self, table_name: str, limit: int = 10) -> pd.DataFrame:
         """
         Get sample rows from a table.
@@ -339,14 +448,18 @@ class DataProcessor:
         """
         try:
             stats = self.get_table_stats(table_name)
-            schema = self.get_table_schema(table_name)
+            schema = stats.get("columns") or self.get_table_schema(table_name)
             
-            # Check for null values
+            # Check for null values - every column in a single table scan
             null_counts = {}
-            for col in schema.keys():
-                null_count = self.conn.execute(f"SELECT COUNT(*) FROM {table_name} WHERE {col} IS NULL").fetchone()[0]
-                if null_count > 0:
-                    null_counts[col] = null_count
+            if schema:
+                columns = list(schema)
+                null_exprs = ", ".join(
+                    f"COUNT(*) - COUNT({_quote_ident(col)})" for col in columns
+                )
+                with self._lock:
+                    row = self.conn.execute(f"SELECT {null_exprs} FROM {table_name}").fetchone()
+                null_counts = {col: count for col, count in zip(columns, row) if count > 0}
             
             validation_report = {
                 "table_name": table_name,
@@ -5,23 +5,63 @@ Supports CSV, Excel, JSON, and text summary files for retail insights ingestion.
 
 from __future__ import annotations
 
-from io import BytesIO, StringIO
+from io import BytesIO, StringIO, TextIOWrapper
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Iterable, Optional, Union
 import json
 import re
 import logging
 
+import duckdb
 import pandas as pd
 import numpy as np
 
+# Optional import - multithreaded CSV parsing and Arrow-backed strings for the cleaning pass
+try:
+    import pyarrow  # noqa: F401
+    _HAS_PYARROW = True
+except ImportError:
+    _HAS_PYARROW = False
+_TEXT_DTYPE = "string[pyarrow]" if _HAS_PYARROW else None
+
+# Optional import - faster JSON parsing
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Optional import - Rust spreadsheet reader (pandas >= 2.2 engine="calamine")
+try:
+    import python_calamine  # noqa: F401
+    _HAS_CALAMINE = True
+except ImportError:
+    _HAS_CALAMINE = False
+
+# Optional import - Rust string kernels for clean_dataframe(engine="polars")
+try:
+    import polars as pl
+except ImportError:
+    pl = None
+
+from .config import CLEAN_ENGINE
+
 logger = logging.getLogger(__name__)
 
+_UNSAFE_CHARS = re.compile(r"[^a-zA-Z0-9_]+")
+_MULTI_UNDERSCORE = re.compile(r"_+")
+# "key: value" (split on the first colon), else "key = value"
+_KEY_VALUE = re.compile(r"^(?:([^:]*):|([^:=]*)=)(.*)")
+# Cells marking summary rows (Total, Subtotal, Grand Total, etc.); whole words only
+_SUMMARY_RE = re.compile(
+    r"\b(?:total|subtotal|grand total|sum|average|avg|overall|summary|grand sum|net total|gross total)\b",
+    re.IGNORECASE,
+)
+
 
 def _clean_table_name(name: str) -> str:
     """Normalize file names into SQL-safe table names."""
-    cleaned = re.sub(r"[^a-zA-Z0-9_]+", "_", name)
-    cleaned = re.sub(r"_+", "_", cleaned).strip("_")
+    cleaned = _UNSAFE_CHARS.sub("_", name)
+    cleaned = _MULTI_UNDERSCORE.sub("_", cleaned).strip("_")
     return cleaned or "loaded_table"
 
 
@@ -30,6 +70,59 @@ def infer_table_name(filename: str) -> str:
     return _clean_table_name(Path(filename).stem)
 
 
+def _read_csv_bytes(file_bytes: bytes) -> pd.DataFrame:
+    """Parse CSV bytes with DuckDB's multithreaded reader, falling back to pandas."""
+    try:
+        conn = duckdb.connect()
+        try:
+            return conn.read_csv(BytesIO(file_bytes)).df()
+        finally:
+            conn.close()
+    except (duckdb.Error, TypeError) as e:
+        # Older DuckDB builds cannot read file-like objects
+        logger.warning(f"DuckDB CSV reader unavailable for upload, using pandas: {e}")
+        if _HAS_PYARROW:
+            try:
+                return pd.read_csv(BytesIO(file_bytes), engine="pyarrow")
+            except Exception as arrow_error:
+                logger.warning(f"pyarrow CSV engine failed, using the C engine: {arrow_error}")
+        return pd.read_csv(BytesIO(file_bytes))
+
+
+def _read_excel_bytes(file_bytes: bytes) -> pd.DataFrame:
+    """Parse spreadsheet bytes with calamine when installed, else pandas' default engine."""
+    if _HAS_CALAMINE:
+        try:
+            return pd.read_excel(BytesIO(file_bytes), engine="calamine")
+        except ValueError as e:
+            # pandas older than 2.2 does not know the engine
+            logger.warning(f"calamine engine unavailable, using openpyxl: {e}")
+    return pd.read_excel(BytesIO(file_bytes))
+
+
+def _parse_json_bytes(file_bytes: bytes) -> Any:
+    """Parse JSON bytes, with orjson when available."""
+    if orjson is not None:
+        try:
+            return orjson.loads(file_bytes)
+        except orjson.JSONDecodeError:
+            pass  # e.g. invalid UTF-8; the lenient decode below drops bad bytes
+    try:
+        # json accepts bytes directly, without a full-size str copy
+        return json.loads(file_bytes)
+    except UnicodeDecodeError:
+        return json.loads(file_bytes.decode("utf-8", errors="ignore"))
+
+
+def _records_to_dataframe(records: list) -> pd.DataFrame:
+    """Build a DataFrame from JSON records, flattening nested objects only when present."""
+    is_flat = all(
+        isinstance(record, dict) and not any(isinstance(v, (dict, list)) for v in record.values())
+        for record in records
+    )
+    return pd.DataFrame(records) if is_flat else pd.json_normalize(records)
+
+
 def load_dataframe_from_bytes(file_name: str, file_bytes: bytes, auto_clean: bool = True) -> pd.DataFrame:
     """
     Load a dataframe from uploaded file bytes based on extension.
@@ -45,23 +138,23 @@ def load_dataframe_from_bytes(file_name: str, file_bytes: bytes, auto_clean: boo
     suffix = Path(file_name).suffix.lower()
 
     if suffix == ".csv":
-        df = pd.read_csv(BytesIO(file_bytes))
+        df = _read_csv_bytes(file_bytes)
     elif suffix in {".xlsx", ".xls"}:
-        df = pd.read_excel(BytesIO(file_bytes))
+        df = _read_excel_bytes(file_bytes)
     elif suffix == ".json":
-        text = file_bytes.decode("utf-8", errors="ignore")
-        payload = json.loads(text)
+        payload = _parse_json_bytes(file_bytes)
         if isinstance(payload, list):
-            df = pd.json_normalize(payload)
+            df = _records_to_dataframe(payload)
         elif isinstance(payload, dict):
             if "data" in payload and isinstance(payload["data"], list):
-                df = pd.json_normalize(payload["data"])
+                df = _records_to_dataframe(payload["data"])
             else:
-                df = pd.json_normalize([payload])
+                df = _records_to_dataframe([payload])
         else:
             raise ValueError("Unsupported JSON structure")
     elif suffix == ".txt":
-        df = parse_text_summary(file_bytes.decode("utf-8", errors="ignore"))
+        # Decoded line by line; the whole file is never held as one str
+        df = parse_text_summary(TextIOWrapper(BytesIO(file_bytes), encoding="utf-8", errors="ignore"))
     else:
         raise ValueError(f"Unsupported file type: {suffix}")
     
@@ -72,42 +165,100 @@ def load_dataframe_from_bytes(file_name: str, file_bytes: bytes, auto_clean: boo
     return df
 
 
-def parse_text_summary(text: str) -> pd.DataFrame:
-    """Parse a simple summary text into key/value rows.
+def parse_text_summary(text: Union[str, Iterable[str]]) -> pd.DataFrame:
+    """Parse a simple summary text (a string or an iterable of lines) into key/value rows.
 
     Supported line formats:
     - key: value
     - key = value
     - plain text lines (captured as notes)
     """
-    rows = []
-    for line in text.splitlines():
-        line = line.strip()
-        if not line:
-            continue
-
-        if ":" in line:
-            key, value = line.split(":", 1)
-            rows.append({"metric": key.strip(), "value": value.strip(), "source": "text"})
-        elif "=" in line:
-            key, value = line.split("=", 1)
-            rows.append({"metric": key.strip(), "value": value.strip(), "source": "text"})
-        else:
-            rows.append({"metric": "note", "value": line, "source": "text"})
+    lines = text.splitlines() if isinstance(text, str) else list(text)
+    lines = pd.Series(lines, dtype=object).str.strip()
+    lines = lines[lines != ""]
+    if lines.empty:
+        return pd.DataFrame([{"metric": "note", "value": "No parsable content found", "source": "text"}])
+
+    # Column-wise split; unmatched lines get NaN in every group and become notes
+    parts = lines.str.extract(_KEY_VALUE)
+    is_pair = parts[2].notna()
+    metric = parts[0].fillna(parts[1]).str.strip().where(is_pair, "note")
+    value = parts[2].str.strip().where(is_pair, lines)
+
+    return pd.DataFrame({
+        "metric": metric.to_numpy(dtype=object),
+        "value": value.to_numpy(dtype=object),
+        "source": "text",
+    })
+
+
+def _strip_column(column: pd.Series) -> pd.Series:
+    """Strip an object column's strings; missing values become NaN, other objects their str().
+    
+    A plain comprehension is faster than astype(str).str.strip() on object dtype.
+    """
+    return pd.Series(
+        [
+            v.strip() if isinstance(v, str)
+            else np.nan if v is None or v is pd.NA or (isinstance(v, float) and v != v)
+            else str(v).strip()
+            for v in column.to_numpy()
+        ],
+        index=column.index,
+        dtype=object,
+    )
+
+
+def _as_str(column: pd.Series) -> pd.Series:
+    """Column ready for the .str accessor, copying only when it is not already all strings."""
+    return column if pd.api.types.is_string_dtype(column) else column.astype(str)
 
-    if not rows:
-        rows.append({"metric": "note", "value": "No parsable content found", "source": "text"})
 
-    return pd.DataFrame(rows)
+def _summary_mask(column: pd.Series) -> pd.Series:
+    """Flag cells containing a summary keyword (Total, Subtotal, ...)."""
+    if column.dtype == object:
+        return _as_str(column).str.contains(_SUMMARY_RE, na=False)
+    # Arrow strings take the pattern text and run it natively (no compiled re objects)
+    return column.str.contains(_SUMMARY_RE.pattern, case=False, na=False)
+
+
+def _clean_text_polars(text: pd.DataFrame) -> tuple:
+    """
+    Strip and blank text columns and flag summary rows with polars (multithreaded)
+    
+    Args:
+        text: Object-dtype text sub-frame
+    
+    Returns:
+        (cleaned text as a pandas DataFrame on text's index, boolean summary-row mask)
+    """
+    frame = pl.from_pandas(text)
+    columns = frame.columns
+    frame = frame.with_columns(
+        pl.when(pl.col(c).str.strip_chars().is_in(["", "nan"]))
+        .then(None)
+        .otherwise(pl.col(c).str.strip_chars())
+        .alias(c)
+        for c in columns
+    )
+    summary_pattern = "(?i)" + _SUMMARY_RE.pattern
+    summary_rows = frame.select(
+        pl.any_horizontal(pl.col(c).str.contains(summary_pattern).fill_null(False) for c in columns)
+    ).to_series().to_numpy()
+    cleaned = frame.to_pandas()
+    cleaned.index = text.index
+    return cleaned, summary_rows
 
 
-def clean_dataframe(df: pd.DataFrame, strict: bool = False) -> pd.DataFrame:
+def clean_dataframe(df: pd.DataFrame, strict: bool = False, engine: Optional[str] = None) -> pd.DataFrame:
     """
     Clean DataFrame by removing irrelevant rows and fixing data quality issues.
     
     Args:
         df: Input DataFrame to clean
         strict: If True, apply stricter cleaning rules (e.g., remove rows with >80% nulls)
+        engine: "pandas" or "polars" for the text passes (defaults to CLEAN_ENGINE);
+            polars falls back to pandas when unavailable or unable to take the frame
     
     Returns:
         Cleaned DataFrame
@@ -118,40 +269,53 @@ def clean_dataframe(df: pd.DataFrame, strict: bool = False) -> pd.DataFrame:
     original_rows = len(df)
     logger.info(f"Starting data cleaning: {original_rows} rows")
     
-    # 1. Trim whitespace from all text columns
+    # 1. Trim whitespace from all text columns and turn empty strings into NaN,
+    # as one pass over the text sub-frame
     text_cols = df.select_dtypes(include=['object']).columns
-    for col in text_cols:
-        df[col] = df[col].astype(str).str.strip()
-        # Replace empty strings with NaN
-        df[col] = df[col].replace('', np.nan)
-        df[col] = df[col].replace('nan', np.nan)
+    summary_done = False
+    if len(text_cols) and (engine or CLEAN_ENGINE) == "polars" and pl is not None:
+        try:
+            text, summary_rows = _clean_text_polars(df[text_cols])
+            df[text_cols] = text
+            # Summary rows (step 4) are dropped here, from the mask computed in the same pass
+            df = df[~summary_rows]
+            summary_done = True
+            logger.info(f"Removed {original_rows - len(df)} summary/total rows")
+        except Exception as e:
+            logger.warning(f"polars cleaning unavailable for this frame, using pandas: {e}")
+    if len(text_cols) and not summary_done:
+        if _TEXT_DTYPE:
+            # Arrow strings: contiguous buffers and vectorized UTF-8 kernels
+            text = df[text_cols].astype(_TEXT_DTYPE, copy=False).apply(lambda s: s.str.strip())
+            missing = pd.NA
+        else:
+            text = df[text_cols].apply(_strip_column)
+            missing = np.nan
+        df[text_cols] = text.replace(['', 'nan'], missing)
     
     # 2. Remove completely empty rows
+    rows_before = len(df)
     df = df.dropna(how='all')
-    logger.info(f"Removed {original_rows - len(df)} completely empty rows")
+    logger.info(f"Removed {rows_before - len(df)} completely empty rows")
     
     # 3. Remove duplicate header rows (where row values match column names)
-    header_mask = df.apply(
-        lambda row: row.astype(str).str.lower().isin(df.columns.str.lower()).sum() >= len(df.columns) * 0.7,
-        axis=1
-    )
+    # Column-at-a-time membership test summed across columns, instead of a Python call per row
+    column_names = {str(c).lower() for c in df.columns}
+    matches = np.zeros(len(df), dtype=np.int64)
+    for i in range(df.shape[1]):
+        matches += _as_str(df.iloc[:, i]).str.lower().isin(column_names).to_numpy(dtype=bool)
+    header_mask = matches >= len(df.columns) * 0.7
     rows_before = len(df)
     df = df[~header_mask]
     if rows_before > len(df):
         logger.info(f"Removed {rows_before - len(df)} duplicate header rows")
     
     # 4. Remove summary rows (Total, Subtotal, Grand Total, etc.)
-    summary_keywords = [
-        'total', 'subtotal', 'grand total', 'sum', 'average', 'avg',
-        'overall', 'summary', 'grand sum', 'net total', 'gross total'
-    ]
+    # One mask over all text columns, so the frame is sliced once rather than per column
     rows_before = len(df)
-    for col in text_cols:
-        if col in df.columns:
-            mask = df[col].astype(str).str.lower().str.contains(
-                '|'.join(summary_keywords), na=False, regex=True
-            )
-            df = df[~mask]
+    summary_cols = [col for col in text_cols if col in df.columns]
+    if summary_cols and len(df) and not summary_done:
+        df = df[~df[summary_cols].apply(_summary_mask).any(axis=1)]
     if rows_before > len(df):
         logger.info(f"Removed {rows_before - len(df)} summary/total rows")
     
@@ -0,0 +1,87 @@
+"""
+LLM Response Cache
+Serves repeated prompts from memory instead of calling the LLM again
+"""
+
+from typing import Any, Dict, Optional
+from collections import OrderedDict
+import copy
+import hashlib
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class LLMCache:
+    """
+    Namespaced, exact-match cache of LLM outputs keyed by prompt text
+
+    Only identical prompts hit: query analyses carry literal filters, limits and
+    dates, so near-duplicate questions must not share them. Namespaces keep
+    analyze/decompose/analysis outputs from being served for each other.
+    """
+
+    def __init__(self, max_entries: int = 256):
+        """
+        Initialize the cache
+
+        Args:
+            max_entries: Entries kept per namespace (least recently used evicted)
+        """
+        self.max_entries = max_entries
+        self._namespaces: Dict[str, "OrderedDict[str, Any]"] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(text: str) -> str:
+        return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+    def lookup(self, namespace: str, prompt: str) -> Optional[Any]:
+        """
+        Find a cached response for prompt
+
+        Args:
+            namespace: Prompt category (e.g. "analyze", "decompose", "analysis")
+            prompt: Canonical prompt text
+
+        Returns:
+            A copy of the cached response, or None on a miss
+        """
+        key = self._key(prompt)
+        with self._lock:
+            entries = self._namespaces.get(namespace)
+            if not entries or key not in entries:
+                return None
+            entries.move_to_end(key)
+            logger.debug(f"LLM cache hit in '{namespace}'")
+            return copy.deepcopy(entries[key])
+
+    def store(self, namespace: str, prompt: str, response: Any) -> None:
+        """
+        Cache response for prompt
+
+        Args:
+            namespace: Prompt category
+            prompt: Canonical prompt text
+            response: Value to return on later hits
+        """
+        key = self._key(prompt)
+        with self._lock:
+            entries = self._namespaces.setdefault(namespace, OrderedDict())
+            entries[key] = copy.deepcopy(response)
+            entries.move_to_end(key)
+            while len(entries) > self.max_entries:
+                entries.popitem(last=False)
+
+    def clear(self, namespace: Optional[str] = None) -> None:
+        """Clear one namespace, or the whole cache"""
+        with self._lock:
+            if namespace is None:
+                self._namespaces.clear()
+            else:
+                self._namespaces.pop(namespace, None)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return sum(len(entries) for entries in self._namespaces.values())
@@ -9,12 +9,157 @@ from reportlab.lib.units import inch
 from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak, Image
 from reportlab.lib import colors
 from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT, TA_JUSTIFY
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from itertools import islice
 import io
+import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
 import plotly.express as px
 
+# Optional import - in-process chart rendering, avoiding a Kaleido/Chromium round trip per chart
+try:
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+except ImportError:
+    Figure = None
+
+# Charts rendered concurrently per report
+CHART_WORKERS = 4
+# Rows drawn for histograms and the correlation heatmap; a chart image cannot resolve more
+CHART_SAMPLE_ROWS = 50_000
+
+# Paragraph styles, built once rather than on every report
+_STYLES = getSampleStyleSheet()
+_TITLE_STYLE = ParagraphStyle(
+    'CustomTitle',
+    parent=_STYLES['Heading1'],
+    fontSize=24,
+    textColor=colors.HexColor('#667eea'),
+    spaceAfter=6,
+    alignment=TA_CENTER,
+    fontName='Helvetica-Bold'
+)
+_HEADING_STYLE = ParagraphStyle(
+    'CustomHeading',
+    parent=_STYLES['Heading2'],
+    fontSize=14,
+    textColor=colors.HexColor('#764ba2'),
+    spaceAfter=12,
+    spaceBefore=12,
+    fontName='Helvetica-Bold'
+)
+_BODY_STYLE = ParagraphStyle(
+    'CustomBody',
+    parent=_STYLES['BodyText'],
+    fontSize=10,
+    spaceAfter=6,
+    alignment=TA_JUSTIFY
+)
+_SUBHEADING_STYLE = ParagraphStyle(
+    'SubHeading', parent=_STYLES['Heading3'], fontSize=12,
+    textColor=colors.HexColor('#667eea'), spaceAfter=8
+)
+_SUBHEADING_ALT_STYLE = ParagraphStyle(
+    'SubHeading', parent=_STYLES['Heading3'], fontSize=12,
+    textColor=colors.HexColor('#764ba2'), spaceAfter=8
+)
+_FOOTER_STYLE = ParagraphStyle(
+    'Footer',
+    parent=_STYLES['Normal'],
+    fontSize=8,
+    textColor=colors.grey,
+    alignment=TA_CENTER
+)
+
+
+def _matplotlib_png(fig) -> bytes:
+    """Render a matplotlib Figure to PNG bytes with the Agg canvas"""
+    FigureCanvasAgg(fig)
+    fig.tight_layout()
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png")
+    return buffer.getvalue()
+
+
+def _histogram_png(raw_data: pd.DataFrame, col: str) -> bytes:
+    """800x300 PNG histogram of one numeric column"""
+    title = f"Distribution of {col}"
+    if Figure is not None:
+        fig = Figure(figsize=(8, 3), dpi=100)
+        ax = fig.add_subplot()
+        ax.hist(raw_data[col].dropna(), bins=30, color='#667eea')
+        ax.set_title(title)
+        ax.set_xlabel(col)
+        ax.set_ylabel("count")
+        return _matplotlib_png(fig)
+    
+    fig = px.histogram(raw_data, x=col, nbins=30, title=title, color_discrete_sequence=['#667eea'])
+    fig.update_layout(height=350, showlegend=False)
+    return fig.to_image(format="png", width=800, height=300)
+
+
+def _bar_png(col_name: str, top_values: dict) -> bytes:
+    """800x300 PNG horizontal bar chart of a column's top values"""
+    title = f"Top Values in {col_name}"
+    if Figure is not None:
+        fig = Figure(figsize=(8, 3), dpi=100)
+        ax = fig.add_subplot()
+        ax.barh([str(k) for k in top_values.keys()], list(top_values.values()), color='#764ba2')
+        ax.set_title(title)
+        return _matplotlib_png(fig)
+    
+    fig = px.bar(x=list(top_values.values()), y=list(top_values.keys()),
+                 title=title, orientation='h', color_discrete_sequence=['#764ba2'])
+    fig.update_layout(height=350, showlegend=False)
+    return fig.to_image(format="png", width=800, height=300)
+
+
+def _chart_sample(raw_data: pd.DataFrame) -> pd.DataFrame:
+    """Fixed-seed random sample of at most CHART_SAMPLE_ROWS rows (the frame itself when smaller)"""
+    if len(raw_data) <= CHART_SAMPLE_ROWS:
+        return raw_data
+    rng = np.random.default_rng(0)
+    rows = np.sort(rng.choice(len(raw_data), CHART_SAMPLE_ROWS, replace=False))
+    return raw_data.iloc[rows]
+
+
+def _category_chart_png(col_name: str, data_info: dict) -> bytes:
+    """Bar chart for one entry of category_analysis, or empty bytes when it has no top values"""
+    top_values = data_info.get('top_values', {})
+    return _bar_png(col_name, top_values) if top_values else b""
+
+
+def _correlation_png(corr_data: pd.DataFrame) -> bytes:
+    """700x500 PNG correlation heatmap with the coefficients printed in each cell"""
+    title = "Correlation Between Numeric Columns"
+    if Figure is not None:
+        fig = Figure(figsize=(7, 5), dpi=100)
+        ax = fig.add_subplot()
+        image = ax.imshow(corr_data.to_numpy(), cmap='RdBu', vmin=-1, vmax=1, aspect='auto')
+        labels = [str(c) for c in corr_data.columns]
+        ax.set_xticks(range(len(labels)), labels, rotation=30, ha='right')
+        ax.set_yticks(range(len(labels)), labels)
+        for i in range(len(labels)):
+            for j in range(len(labels)):
+                value = corr_data.iat[i, j]
+                if pd.notna(value):
+                    ax.text(j, i, f"{value:.2f}", ha='center', va='center', fontsize=8)
+        fig.colorbar(image, ax=ax)
+        ax.set_title(title)
+        return _matplotlib_png(fig)
+    
+    fig = px.imshow(corr_data, text_auto=True, aspect="auto",
+                    color_continuous_scale='RdBu', title=title)
+    fig.update_layout(height=400, width=600)
+    return fig.to_image(format="png", width=700, height=500)
+
+
+def _numeric_row(col: str, stats: dict) -> list:
+    """One row of the numeric statistics table"""
+    return [col[:15]] + [f"{stats.get(key, 0):.2f}" for key in ('mean', 'median', 'std', 'min', 'max')]
+
 
 def generate_pdf_report(analysis_data: dict, include_charts: bool = True) -> bytes:
     """
@@ -37,35 +182,9 @@ def generate_pdf_report(analysis_data: dict, include_charts: bool = True) -> byt
     # Container for PDF elements
     story = []
     
-    # Define styles
-    styles = getSampleStyleSheet()
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=24,
-        textColor=colors.HexColor('#667eea'),
-        spaceAfter=6,
-        alignment=TA_CENTER,
-        fontName='Helvetica-Bold'
-    )
-    
-    heading_style = ParagraphStyle(
-        'CustomHeading',
-        parent=styles['Heading2'],
-        fontSize=14,
-        textColor=colors.HexColor('#764ba2'),
-        spaceAfter=12,
-        spaceBefore=12,
-        fontName='Helvetica-Bold'
-    )
-    
-    body_style = ParagraphStyle(
-        'CustomBody',
-        parent=styles['BodyText'],
-        fontSize=10,
-        spaceAfter=6,
-        alignment=TA_JUSTIFY
-    )
+    title_style = _TITLE_STYLE
+    heading_style = _HEADING_STYLE
+    body_style = _BODY_STYLE
     
     # Title
     story.append(Paragraph("Professional Data Analysis Report", title_style))
@@ -144,16 +263,11 @@ def generate_pdf_report(analysis_data: dict, include_charts: bool = True) -> byt
     if numeric_stats:
         story.append(Paragraph("Numeric Column Statistics", heading_style))
         
-        numeric_data = [['Column', 'Mean', 'Median', 'Std Dev', 'Min', 'Max']]
-        for col, stats in list(numeric_stats.items())[:8]:  # Limit to 8 columns
-            numeric_data.append([
-                col[:15],  # Truncate long names
-                f"{stats.get('mean', 0):.2f}",
-                f"{stats.get('median', 0):.2f}",
-                f"{stats.get('std', 0):.2f}",
-                f"{stats.get('min', 0):.2f}",
-                f"{stats.get('max', 0):.2f}"
-            ])
+        # Limit to 8 columns; islice avoids copying every item of a wide table's stats
+        numeric_data = [
+            ['Column', 'Mean', 'Median', 'Std Dev', 'Min', 'Max'],
+            *(_numeric_row(col, col_stats) for col, col_stats in islice(numeric_stats.items(), 8)),
+        ]
         
         numeric_table = Table(numeric_data, colWidths=[1.2*inch, 0.8*inch, 0.8*inch, 0.8*inch, 0.8*inch, 0.8*inch])
         numeric_table.setStyle(TableStyle([
@@ -189,81 +303,57 @@ def generate_pdf_report(analysis_data: dict, include_charts: bool = True) -> byt
             raw_data = analysis_data.get('raw_data')
             numeric_cols = analysis_data.get('numeric_cols', [])
             category_analysis = analysis_data.get('category_analysis', {})
+            show_histograms = bool(numeric_cols) and raw_data is not None
+            show_correlation = show_histograms and len(numeric_cols) >= 2
+            chart_data = _chart_sample(raw_data) if show_histograms else raw_data
+            
+            # Render every chart at once; the story below is still assembled in order
+            with ThreadPoolExecutor(max_workers=CHART_WORKERS) as pool:
+                histogram_jobs = [
+                    pool.submit(_histogram_png, chart_data, col)
+                    for col in (numeric_cols[:2] if show_histograms else [])  # First 2 numeric columns
+                ]
+                bar_jobs = [
+                    pool.submit(_category_chart_png, col_name, data_info)
+                    for col_name, data_info in islice(category_analysis.items(), 2)  # First 2 categories
+                ]
+                correlation_job = (
+                    pool.submit(lambda: _correlation_png(chart_data[numeric_cols[:5]].corr()))
+                    if show_correlation else None
+                )
+            
+            def add_chart(job, height, space):
+                """Append a rendered chart; charts that failed to render are skipped"""
+                try:
+                    img_bytes = job.result()
+                except Exception:
+                    return
+                if img_bytes:
+                    story.append(Image(io.BytesIO(img_bytes), width=6*inch, height=height))
+                    story.append(Spacer(1, space))
             
             story.append(PageBreak())
             story.append(Paragraph("Data Visualizations", heading_style))
             story.append(Spacer(1, 0.2*inch))
             
             # Numeric Distributions
-            if numeric_cols and raw_data is not None:
-                story.append(Paragraph("Numeric Column Distributions", ParagraphStyle(
-                    'SubHeading', parent=styles['Heading3'], fontSize=12, 
-                    textColor=colors.HexColor('#667eea'), spaceAfter=8
-                )))
-                
-                # Create histogram charts
-                for col in numeric_cols[:2]:  # First 2 numeric columns
-                    try:
-                        fig = px.histogram(raw_data, x=col, nbins=30, title=f"Distribution of {col}",
-                                         color_discrete_sequence=['#667eea'])
-                        fig.update_layout(height=350, showlegend=False)
-                        
-                        # Convert plotly to image
-                        img_bytes = fig.to_image(format="png", width=800, height=300)
-                        img_buffer = io.BytesIO(img_bytes)
-                        img = Image(img_buffer, width=6*inch, height=2.2*inch)
-                        story.append(img)
-                        story.append(Spacer(1, 0.15*inch))
-                    except:
-                        pass
+            if show_histograms:
+                story.append(Paragraph("Numeric Column Distributions", _SUBHEADING_STYLE))
+                for job in histogram_jobs:
+                    add_chart(job, 2.2*inch, 0.15*inch)
             
             # Category Analysis
             if category_analysis:
                 story.append(PageBreak())
-                story.append(Paragraph("Category Analysis", ParagraphStyle(
-                    'SubHeading', parent=styles['Heading3'], fontSize=12,
-                    textColor=colors.HexColor('#764ba2'), spaceAfter=8
-                )))
-                
-                for col_name, data_info in list(category_analysis.items())[:2]:  # First 2 categories
-                    try:
-                        top_values = data_info.get('top_values', {})
-                        if top_values:
-                            fig = px.bar(x=list(top_values.values()), y=list(top_values.keys()),
-                                       title=f"Top Values in {col_name}", orientation='h',
-                                       color_discrete_sequence=['#764ba2'])
-                            fig.update_layout(height=350, showlegend=False)
-                            
-                            img_bytes = fig.to_image(format="png", width=800, height=300)
-                            img_buffer = io.BytesIO(img_bytes)
-                            img = Image(img_buffer, width=6*inch, height=2.2*inch)
-                            story.append(img)
-                            story.append(Spacer(1, 0.15*inch))
-                    except:
-                        pass
+                story.append(Paragraph("Category Analysis", _SUBHEADING_ALT_STYLE))
+                for job in bar_jobs:
+                    add_chart(job, 2.2*inch, 0.15*inch)
             
             # Correlation Heatmap
-            if numeric_cols and len(numeric_cols) >= 2 and raw_data is not None:
+            if show_correlation:
                 story.append(PageBreak())
-                story.append(Paragraph("Correlation Analysis", ParagraphStyle(
-                    'SubHeading', parent=styles['Heading3'], fontSize=12,
-                    textColor=colors.HexColor('#667eea'), spaceAfter=8
-                )))
-                
-                try:
-                    corr_data = raw_data[numeric_cols[:5]].corr()
-                    fig = px.imshow(corr_data, text_auto=True, aspect="auto",
-                                   color_continuous_scale='RdBu',
-                                   title="Correlation Between Numeric Columns")
-                    fig.update_layout(height=400, width=600)
-                    
-                    img_bytes = fig.to_image(format="png", width=700, height=500)
-                    img_buffer = io.BytesIO(img_bytes)
-                    img = Image(img_buffer, width=6*inch, height=4.3*inch)
-                    story.append(img)
-                    story.append(Spacer(1, 0.2*inch))
-                except:
-                    pass
+                story.append(Paragraph("Correlation Analysis", _SUBHEADING_STYLE))
+                add_chart(correlation_job, 4.3*inch, 0.2*inch)
         except Exception as e:
             pass  # Skip charts if any error occurs
     
@@ -294,14 +384,7 @@ def generate_pdf_report(analysis_data: dict, include_charts: bool = True) -> byt
     story.append(Spacer(1, 0.5*inch))
     
     # Footer
-    footer_style = ParagraphStyle(
-        'Footer',
-        parent=styles['Normal'],
-        fontSize=8,
-        textColor=colors.grey,
-        alignment=TA_CENTER
-    )
-    story.append(Paragraph("Generated by Retail Insights Assistant | Professional Data Analytics", footer_style))
+    story.append(Paragraph("Generated by Retail Insights Assistant | Professional Data Analytics", _FOOTER_STYLE))
     
     # Build PDF
     doc.build(story)
@@ -4,18 +4,45 @@ Loads prompts from text files in the prompts/ directory
 """
 
 import os
+import string
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict
+from typing import Dict, Optional, Tuple
+
+_CONVERSIONS = {"s": str, "r": repr, "a": ascii}
+
+
+@lru_cache(maxsize=256)
+def _read_prompt_file(path: str, mtime_ns: int) -> str:
+    """Read a prompt file; keyed on mtime so edits on disk are picked up"""
+    return Path(path).read_text(encoding='utf-8').strip()
+
+
+@lru_cache(maxsize=256)
+def _compile_template(template: str) -> Optional[Tuple[Tuple[str, Optional[str], str, Optional[str]], ...]]:
+    """
+    Parse a str.format template once into (literal, field, spec, conversion) parts
+    
+    Returns None when a field uses attribute/index access or a nested spec,
+    which is left to str.format.
+    """
+    parts = tuple(string.Formatter().parse(template))
+    for _, field, spec, _ in parts:
+        if field is not None and (not field.isidentifier() or "{" in spec):
+            return None
+    return parts
+
 
 class PromptLoader:
     """Load and manage prompts from external files"""
     
-    def __init__(self, prompts_dir: str = None):
+    def __init__(self, prompts_dir: str = None, lazy: bool = False):
         """
         Initialize prompt loader
         
         Args:
             prompts_dir: Path to prompts directory (defaults to project_root/prompts/)
+            lazy: If True, read each prompt on first use instead of preloading them all
         """
         if prompts_dir is None:
             # Get project root (parent of src/)
@@ -25,7 +52,26 @@ class PromptLoader:
             prompts_dir = project_root / "prompts"
         
         self.prompts_dir = Path(prompts_dir)
-        self._cache = {}
+        if not lazy:
+            self.preload()
+    
+    def preload(self) -> int:
+        """
+        Read every prompt in the directory into the cache with one directory scan
+        
+        Returns:
+            Number of prompts loaded
+        """
+        loaded = 0
+        try:
+            with os.scandir(self.prompts_dir) as entries:
+                for entry in entries:
+                    if entry.name.endswith(".txt") and entry.is_file():
+                        _read_prompt_file(entry.path, entry.stat().st_mtime_ns)
+                        loaded += 1
+        except OSError:
+            pass  # Missing directory: load_prompt reports the missing file
+        return loaded
     
     def load_prompt(self, prompt_name: str) -> str:
         """
@@ -37,23 +83,15 @@ class PromptLoader:
         Returns:
             Prompt content as string
         """
-        # Check cache first
-        if prompt_name in self._cache:
-            return self._cache[prompt_name]
-        
-        # Load from file
         prompt_file = self.prompts_dir / f"{prompt_name}.txt"
         
-        if not prompt_file.exists():
-            raise FileNotFoundError(f"Prompt file not found: {prompt_file}")
-        
-        with open(prompt_file, 'r', encoding='utf-8') as f:
-            prompt_content = f.read().strip()
-        
-        # Cache for future use
-        self._cache[prompt_name] = prompt_content
+        try:
+            mtime_ns = prompt_file.stat().st_mtime_ns
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Prompt file not found: {prompt_file}") from None
         
-        return prompt_content
+        # Served from cache until the file changes on disk
+        return _read_prompt_file(str(prompt_file), mtime_ns)
     
     def format_prompt(self, prompt_name: str, **kwargs) -> str:
         """
@@ -69,7 +107,20 @@ class PromptLoader:
         prompt_template = self.load_prompt(prompt_name)
         
         try:
-            return prompt_template.format(**kwargs)
+            parts = _compile_template(prompt_template)
+            if parts is None:
+                return prompt_template.format(**kwargs)
+            
+            # Join pre-parsed pieces instead of re-scanning the template on every call
+            chunks = []
+            for literal, field, spec, conversion in parts:
+                chunks.append(literal)
+                if field is not None:
+                    value = kwargs[field]
+                    if conversion:
+                        value = _CONVERSIONS[conversion](value)
+                    chunks.append(format(value, spec))
+            return "".join(chunks)
         except KeyError as e:
             raise ValueError(f"Missing required prompt variable: {e}")
     
@@ -82,13 +133,12 @@ class PromptLoader:
     
     def reload_prompt(self, prompt_name: str) -> str:
         """Force reload a prompt from disk (bypass cache)"""
-        if prompt_name in self._cache:
-            del self._cache[prompt_name]
+        _read_prompt_file.cache_clear()
         return self.load_prompt(prompt_name)
     
     def clear_cache(self):
         """Clear all cached prompts"""
-        self._cache.clear()
+        _read_prompt_file.cache_clear()
 
 
 # Global instance for easy import
@@ -3,22 +3,409 @@ Response Formatter for Q&A System
 Formats agent responses with charts, tables, and confidence indicators
 """
 
+import hashlib
+import json
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 import pandas as pd
-from typing import Dict, List, Any, Optional, Tuple
-import plotly.graph_objects as go
-import plotly.express as px
+from typing import Callable, Dict, List, Any, Optional, Tuple
 from .data_processor import get_processor
 import logging
 
-logging.basicConfig(level=logging.INFO)
+# Optional import - fast JSON with native numpy array support
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Optional import - shape-preserving (MinMaxLTTB) down-sampling for long time series
+try:
+    from tsdownsample import MinMaxLTTBDownsampler
+except ImportError:
+    MinMaxLTTBDownsampler = None
+
 logger = logging.getLogger(__name__)
 
+# Visualization kinds _generate_visualizations can build, keyed as in "suggested_visualizations"
+VISUALIZATION_KINDS = frozenset({"summary_stats", "line_chart", "bar_chart", "histogram", "box_plot", "heatmap"})
+# Cheap kinds, built whenever their columns exist; only the costly box plot / heatmap wait to be suggested
+UNGATED_KINDS = frozenset({"summary_stats", "line_chart", "bar_chart", "histogram"})
+# Chart names the model may suggest for a kind this module draws differently
+_VISUALIZATION_ALIASES = {
+    "area_chart": "line_chart",
+    "multi_axis": "line_chart",
+    "horizontal_bar": "bar_chart",
+    "pie_chart": "bar_chart",
+    "combo_chart": "bar_chart",
+    "correlation": "heatmap",
+}
+CHART_MAX_ROWS = 50_000  # Larger results are sampled for summary stats and distribution charts
+LINE_CHART_POINTS = 2_000  # Points kept on the time-series line
+CHART_WORKERS = 4  # Charts of one response built in parallel
+HISTOGRAM_BINS = 30
+HEATMAP_MAX_COLUMNS = 30  # Numeric columns correlated for the heatmap (unreadable beyond that)
+CHART_CACHE_SIZE = 128  # Serialized chart specs kept across responses
+
+_DATE_RE = re.compile(r"date|time", re.IGNORECASE)
+
+
+# Follow-up questions per query type (tuples: built once, copied per response)
+_FOLLOWUP_MAP: Dict[str, Tuple[str, ...]] = {
+    "summary": (
+        "Can you break this down by region?",
+        "What's the trend over time?",
+        "How does this compare to last period?",
+    ),
+    "analytical": (
+        "Which segment drove this result?",
+        "What's the growth rate?",
+        "Show me the distribution.",
+    ),
+    "comparison": (
+        "What are the key differences?",
+        "Which performed better overall?",
+        "What's driving the variance?",
+    ),
+    "timeseries": (
+        "What's the forecast?",
+        "Where are the anomalies?",
+        "What caused the peaks/valleys?",
+    ),
+}
+_DEFAULT_FOLLOWUPS: Tuple[str, ...] = (
+    "Can you provide more details?",
+    "What's the business impact?",
+    "How does this trend?",
+)
+
+
+def _json_default(obj: Any) -> Any:
+    """Encode values neither JSON encoder handles natively (numpy, timestamps, other labels)"""
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if hasattr(obj, "isoformat"):
+        return obj.isoformat()
+    return str(obj)
+
+
+def _spec_json(spec: Dict[str, Any]) -> str:
+    """
+    Serialize a Plotly figure dict for the UI
+    
+    Specs are assembled as plain dicts: building px/go figure objects only to
+    serialize them again costs far more than the chart data itself.
+    """
+    if orjson is not None:
+        return orjson.dumps(spec, default=_json_default, option=orjson.OPT_SERIALIZE_NUMPY).decode()
+    return json.dumps(spec, default=_json_default)
+
+
+def _axis_values(column: pd.Series) -> Any:
+    """Column values for a trace: numeric arrays as-is, dates as ISO strings, anything else as a list"""
+    values = column.to_numpy()
+    if values.dtype.kind in "biuf":
+        return np.ascontiguousarray(values)
+    if values.dtype.kind == "M":
+        return np.datetime_as_string(values, unit="ms").tolist()
+    return values.tolist()
+
+
+def _preview_columns(data: pd.DataFrame, max_rows: int = 10) -> Dict[str, List[Any]]:
+    """
+    First rows in columnar form: {"columns": [names], "data": [values per column]}
+    
+    Each column is converted to Python values in one tolist() call instead of
+    boxing cell by cell; datetime columns keep their Timestamp values.
+    """
+    head = data.iloc[:max_rows]
+    columns = []
+    for _, column in head.items():
+        values = column.to_numpy()
+        columns.append(list(column) if values.dtype.kind in "Mm" else values.tolist())
+    return {"columns": head.columns.tolist(), "data": columns}
+
+
+def _preview_records(data: pd.DataFrame, max_rows: int = 10) -> List[Dict[str, Any]]:
+    """First rows as a list of records, like head(max_rows).to_dict('records')"""
+    preview = _preview_columns(data, max_rows)
+    return [dict(zip(preview["columns"], row)) for row in zip(*preview["data"])]
+
+
+def _classify_columns(data: pd.DataFrame) -> Tuple[List[Any], List[Any], Optional[Any]]:
+    """
+    Partition columns into numeric and categorical (object/category) lists and find the date column
+    
+    Numeric/categorical match select_dtypes(include=['number']) / (include=['object', 'category']);
+    the date column is the first one named like "date"/"time". One pass over the columns.
+    """
+    numeric_cols, categorical_cols, date_col = [], [], None
+    for col, dtype in zip(data.columns, data.dtypes):
+        if date_col is None and isinstance(col, str) and _DATE_RE.search(col):
+            date_col = col
+        if dtype.kind in "iufc":
+            numeric_cols.append(col)
+        elif dtype == object or isinstance(dtype, pd.CategoricalDtype):
+            categorical_cols.append(col)
+    return numeric_cols, categorical_cols, date_col
+
+
+def _histogram_trace(column: pd.Series) -> Optional[Dict[str, Any]]:
+    """
+    Pre-binned histogram as a bar trace: HISTOGRAM_BINS counts instead of every raw value
+    
+    Returns None when the column has no finite values.
+    """
+    values = column.to_numpy(dtype=np.float64, na_value=np.nan)
+    values = values[np.isfinite(values)]
+    if values.size == 0:
+        return None
+    counts, edges = np.histogram(values, bins=HISTOGRAM_BINS)
+    return {
+        "type": "bar",
+        "x": (edges[:-1] + edges[1:]) * 0.5,
+        "y": counts,
+        "width": float(edges[1] - edges[0]),
+        "marker": {"color": "#1f77b4"},
+    }
+
+
+def _box_trace(data: pd.DataFrame, cat_col: Any, val_col: Any) -> Dict[str, Any]:
+    """
+    Box plot per category from precomputed quartiles and fences instead of raw points
+    
+    Fences follow Plotly's default: the furthest values within 1.5 IQR of the box.
+    """
+    values = data[val_col]
+    groups = data[cat_col]
+    grouped = values.groupby(groups, sort=False, observed=True)
+    quartiles = grouped.quantile([0.25, 0.5, 0.75]).unstack()
+    q1, median, q3 = quartiles[0.25], quartiles[0.5], quartiles[0.75]
+    row_q1 = grouped.transform("quantile", 0.25)
+    row_q3 = grouped.transform("quantile", 0.75)
+    row_iqr = row_q3 - row_q1
+    within = values.where(
+        (values >= row_q1 - 1.5 * row_iqr) & (values <= row_q3 + 1.5 * row_iqr)
+    ).groupby(groups, sort=False, observed=True)
+    return {
+        "type": "box",
+        "x": quartiles.index.tolist(),
+        "q1": _axis_values(q1),
+        "median": _axis_values(median),
+        "q3": _axis_values(q3),
+        "lowerfence": _axis_values(within.min().reindex(quartiles.index)),
+        "upperfence": _axis_values(within.max().reindex(quartiles.index)),
+    }
+
+
+def _correlation_matrix(data: pd.DataFrame, columns: List[Any]) -> np.ndarray:
+    """
+    Pearson correlation matrix of the given numeric columns
+    
+    One np.corrcoef call on a contiguous float matrix; frames with missing values
+    go through DataFrame.corr, which drops NaNs pair by pair.
+    """
+    values = np.ascontiguousarray(data[columns].to_numpy(dtype=np.float64, na_value=np.nan))
+    if np.isnan(values).any():
+        return data[columns].corr().to_numpy()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.corrcoef(values, rowvar=False)
+
+
+def _layout(title: str, x_title: Any = "", y_title: Any = "", **extra) -> Dict[str, Any]:
+    """Figure layout with a title and axis titles"""
+    return {
+        "title": {"text": title},
+        "xaxis": {"title": {"text": str(x_title)}},
+        "yaxis": {"title": {"text": str(y_title)}},
+        **extra,
+    }
+
+
+def _line_spec(data: pd.DataFrame, date_col: Any, value_col: Any) -> Dict[str, Any]:
+    """Line chart of value_col over date_col (only the two columns are reordered, not the frame)"""
+    dates = data[date_col]
+    try:
+        order = np.argsort(dates.to_numpy(), kind="stable")
+    except TypeError:
+        # Object columns mixing values and None: let pandas place the missing ones last
+        order = dates.reset_index(drop=True).sort_values(kind="stable").index.to_numpy()
+    order = _thin_line(dates, data[value_col], order)
+    return {
+        "data": [{
+            "type": "scatter",
+            "mode": "lines+markers",
+            "x": _axis_values(dates.take(order)),
+            "y": _axis_values(data[value_col].take(order)),
+        }],
+        "layout": _layout("Trend Over Time", date_col, value_col),
+    }
+
+
+def _thin_line(dates: pd.Series, values: pd.Series, order: np.ndarray) -> np.ndarray:
+    """
+    Keep at most LINE_CHART_POINTS of the date-ordered positions
+    
+    Uses MinMaxLTTB when tsdownsample is installed (keeps peaks and the line's shape),
+    otherwise evenly spaced points.
+    """
+    if order.size <= LINE_CHART_POINTS:
+        return order
+    if MinMaxLTTBDownsampler is not None:
+        try:
+            x = dates.to_numpy()[order]
+            if x.dtype.kind == "M":
+                x = x.view(np.int64)
+            y = values.to_numpy()[order]
+            return order[MinMaxLTTBDownsampler().downsample(x, y, n_out=LINE_CHART_POINTS)]
+        except Exception as e:
+            logger.debug("LTTB down-sampling failed, using evenly spaced points: %s", e)
+    return order[np.linspace(0, order.size - 1, LINE_CHART_POINTS).astype(np.intp)]
+
+
+def _top_indices(column: pd.Series, k: int) -> np.ndarray:
+    """
+    Positions of the k largest values, largest first, like nlargest(k) (NaNs skipped)
+    
+    np.argpartition finds them in O(n); only those k are then sorted.
+    """
+    values = column.to_numpy()
+    if values.dtype.kind not in "iu":
+        values = column.to_numpy(dtype=np.float64, na_value=np.nan)
+        candidates = np.flatnonzero(~np.isnan(values))
+    else:
+        candidates = np.arange(values.size)
+    k = min(k, candidates.size)
+    if k == 0:
+        return candidates
+    split = candidates.size - k
+    top = candidates[np.argpartition(values[candidates], split)[split:]]
+    # Descending by value, ties in row order
+    return top[np.lexsort((-top, values[top]))[::-1]]
+
+
+def _bar_spec(data: pd.DataFrame, cat_col: Any, val_col: Any) -> Dict[str, Any]:
+    """Bar chart of the 10 largest val_col rows, labelled by cat_col"""
+    top = _top_indices(data[val_col], 10)
+    values = _axis_values(data[val_col].take(top))
+    return {
+        "data": [{
+            "type": "bar",
+            "x": _axis_values(data[cat_col].take(top)),
+            "y": values,
+            "marker": {"color": values, "coloraxis": "coloraxis"},
+        }],
+        "layout": _layout(
+            "Top 10 by Value", cat_col, val_col,
+            coloraxis={"colorscale": "Viridis", "colorbar": {"title": {"text": str(val_col)}}},
+            showlegend=False,
+        ),
+    }
+
+
+def _histogram_spec(data: pd.DataFrame, column: Any) -> Optional[Dict[str, Any]]:
+    """Histogram of one numeric column, or None if it has no finite values"""
+    trace = _histogram_trace(data[column])
+    if trace is None:
+        return None
+    return {
+        "data": [trace],
+        "layout": _layout(f"Distribution of {column}", column, "count", bargap=0),
+    }
+
+
+def _box_spec(data: pd.DataFrame, cat_col: Any, val_col: Any) -> Dict[str, Any]:
+    """Box plot of val_col per cat_col value"""
+    return {
+        "data": [_box_trace(data, cat_col, val_col)],
+        "layout": _layout(f"{val_col} by {cat_col}", cat_col, val_col),
+    }
+
+
+def _heatmap_spec(data: pd.DataFrame, columns: List[Any]) -> Dict[str, Any]:
+    """Correlation heatmap of the given numeric columns"""
+    labels = [str(c) for c in columns]
+    return {
+        "data": [{
+            "type": "heatmap",
+            "z": _correlation_matrix(data, columns),
+            "x": labels,
+            "y": labels,
+            "colorscale": "RdBu",
+            "zmid": 0,
+        }],
+        "layout": _layout("Correlation Matrix"),
+    }
+
+
+def _fingerprint(data: pd.DataFrame) -> Optional[bytes]:
+    """
+    Digest of a result frame's column names, dtypes and values (not its index)
+    
+    Returns None for frames pandas cannot hash (e.g. list-valued cells).
+    """
+    try:
+        hashes = pd.util.hash_pandas_object(data, index=False).to_numpy()
+    except (TypeError, ValueError):
+        return None
+    digest = hashlib.blake2b(hashes.tobytes(), digest_size=16)
+    digest.update(repr([(col, str(dtype)) for col, dtype in zip(data.columns, data.dtypes)]).encode())
+    return digest.digest()
+
+
+# Serialized chart specs keyed by (frame fingerprint, chart kind), kept as an LRU
+_chart_cache: "OrderedDict[Tuple[bytes, str], str]" = OrderedDict()
+_chart_cache_lock = threading.Lock()
+
+
+def _chart_json(fingerprint: Optional[bytes], kind: str, build: Callable[..., Optional[Dict[str, Any]]], *args) -> Optional[str]:
+    """
+    Serialized spec for one chart, reused when the same frame was charted before
+    
+    Args:
+        fingerprint: _fingerprint of the frame (None disables caching)
+        kind: Chart kind, part of the cache key
+        build: Spec builder, called with *args on a miss
+        
+    Returns:
+        Spec JSON, or None if the builder produced no chart
+    """
+    key = (fingerprint, kind)
+    if fingerprint is not None:
+        with _chart_cache_lock:
+            spec_json = _chart_cache.get(key)
+            if spec_json is not None:
+                _chart_cache.move_to_end(key)
+                return spec_json
+    
+    spec = build(*args)
+    if spec is None:
+        return None
+    spec_json = _spec_json(spec)
+    
+    if fingerprint is not None:
+        with _chart_cache_lock:
+            _chart_cache[key] = spec_json
+            while len(_chart_cache) > CHART_CACHE_SIZE:
+                _chart_cache.popitem(last=False)
+    return spec_json
+
+
+# Shared by all formatters; threads start on first use
+_chart_pool = ThreadPoolExecutor(max_workers=CHART_WORKERS, thread_name_prefix="chart")
+
 
 class ResponseFormatter:
     """
     Formats Q&A responses with visualizations and structured data
     """
     
+    __slots__ = ("processor",)
+    
     def __init__(self, processor=None):
         self.processor = processor or get_processor()
     
@@ -42,7 +429,7 @@ class ResponseFormatter:
             {
                 "summary": "text answer",
                 "confidence_score": 0.85,
-                "data_preview": dataframe or None,
+                "data_preview": {"columns": [names], "data": [first 10 values per column]} or None,
                 "row_count": int,
                 "visualizations": [chart specs],
                 "suggested_followups": ["question1", "question2"],
@@ -71,7 +458,7 @@ class ResponseFormatter:
         # Add data preview
         if data is not None and len(data) > 0:
             formatted["row_count"] = len(data)
-            formatted["data_preview"] = data.head(10).to_dict('records')
+            formatted["data_preview"] = _preview_columns(data, 10)
             
             # Generate visualizations based on query type
             visualizations = self._generate_visualizations(data, query_result)
@@ -107,125 +494,76 @@ class ResponseFormatter:
             query_type = query_result.get("query_type", "") if query_result else ""
             suggested = query_result.get("suggested_visualizations", []) if query_result else []
             
-            # Get numeric and categorical columns
-            numeric_cols = data.select_dtypes(include=['number']).columns.tolist()
-            categorical_cols = data.select_dtypes(include=['object', 'category']).columns.tolist()
+            # Cheap kinds always, costly ones only when suggested; no (or no known) suggestions means everything
+            suggested_kinds = VISUALIZATION_KINDS.intersection(
+                _VISUALIZATION_ALIASES.get(kind, kind) for kind in suggested if isinstance(kind, str)
+            )
+            wanted = suggested_kinds | UNGATED_KINDS if suggested_kinds else VISUALIZATION_KINDS
+            
+            # Distribution views don't need every row of a very large result (seeded: same rows every time)
+            sample = data if len(data) <= CHART_MAX_ROWS else data.sample(n=CHART_MAX_ROWS, random_state=0)
+            
+            # Numeric, categorical and date columns in one pass over the columns
+            numeric_cols, categorical_cols, date_col = _classify_columns(data)
+            fingerprint = _fingerprint(data)
             
             # Summary statistics table
-            if len(numeric_cols) > 0:
-                stats = data[numeric_cols].describe().round(2)
+            if "summary_stats" in wanted and len(numeric_cols) > 0:
+                stats = sample[numeric_cols].describe().round(2)
                 visualizations.append({
                     "type": "table",
                     "title": "Summary Statistics",
                     "data": stats.reset_index().to_dict('records')
                 })
             
+            # Charts to build: (type, title, builder, builder args), in display order
+            jobs = []
+            
             # Time series chart if date column exists
-            date_cols = [col for col in data.columns if 'date' in col.lower() or 'time' in col.lower()]
-            if date_cols and len(numeric_cols) > 0:
-                date_col = date_cols[0]
-                value_col = numeric_cols[0]
-                
-                try:
-                    df_sorted = data.sort_values(date_col)
-                    fig = px.line(
-                        df_sorted,
-                        x=date_col,
-                        y=value_col,
-                        title="Trend Over Time",
-                        markers=True
-                    )
-                    visualizations.append({
-                        "type": "line_chart",
-                        "title": "Trend Over Time",
-                        "spec": fig.to_json()
-                    })
-                except Exception as e:
-                    logger.debug(f"Could not create time series: {e}")
+            if "line_chart" in wanted and date_col is not None and len(numeric_cols) > 0:
+                jobs.append(("line_chart", "Trend Over Time", _line_spec, (data, date_col, numeric_cols[0])))
             
             # Bar chart for top categories
-            if categorical_cols and len(numeric_cols) > 0:
-                cat_col = categorical_cols[0]
-                val_col = numeric_cols[0]
-                
-                try:
-                    top_data = data.nlargest(10, val_col)[[cat_col, val_col]]
-                    fig = px.bar(
-                        top_data,
-                        x=cat_col,
-                        y=val_col,
-                        title="Top 10 by Value",
-                        color=val_col,
-                        color_continuous_scale="Viridis"
-                    )
-                    fig.update_layout(showlegend=False)
-                    visualizations.append({
-                        "type": "bar_chart",
-                        "title": "Top 10 by Value",
-                        "spec": fig.to_json()
-                    })
-                except Exception as e:
-                    logger.debug(f"Could not create bar chart: {e}")
+            if "bar_chart" in wanted and categorical_cols and len(numeric_cols) > 0:
+                jobs.append(("bar_chart", "Top 10 by Value", _bar_spec, (data, categorical_cols[0], numeric_cols[0])))
             
             # Distribution histogram
-            if len(numeric_cols) >= 1:
-                fig = px.histogram(
-                    data,
-                    x=numeric_cols[0],
-                    nbins=30,
-                    title=f"Distribution of {numeric_cols[0]}",
-                    color_discrete_sequence=["#1f77b4"]
-                )
-                visualizations.append({
-                    "type": "histogram",
-                    "title": f"Distribution of {numeric_cols[0]}",
-                    "spec": fig.to_json()
-                })
+            if "histogram" in wanted and len(numeric_cols) >= 1:
+                jobs.append(("histogram", f"Distribution of {numeric_cols[0]}", _histogram_spec, (sample, numeric_cols[0])))
             
             # Box plot for outliers
-            if len(numeric_cols) >= 1 and len(categorical_cols) > 0:
+            if "box_plot" in wanted and len(numeric_cols) >= 1 and len(categorical_cols) > 0:
+                jobs.append((
+                    "box_plot", f"Distribution by {categorical_cols[0]}", _box_spec,
+                    (sample, categorical_cols[0], numeric_cols[0])
+                ))
+            
+            # Correlation heatmap if multiple numeric columns
+            if "heatmap" in wanted and len(numeric_cols) > 2:
+                jobs.append(("heatmap", "Correlation Matrix", _heatmap_spec, (sample, numeric_cols[:HEATMAP_MAX_COLUMNS])))
+            
+            # Independent charts build concurrently (NumPy and orjson release the GIL); results keep job order
+            def build(job):
+                chart_type, _, builder, args = job
                 try:
-                    fig = px.box(
-                        data,
-                        x=categorical_cols[0],
-                        y=numeric_cols[0],
-                        title=f"{numeric_cols[0]} by {categorical_cols[0]}"
-                    )
-                    visualizations.append({
-                        "type": "box_plot",
-                        "title": f"Distribution by {categorical_cols[0]}",
-                        "spec": fig.to_json()
-                    })
+                    return _chart_json(fingerprint, chart_type, builder, *args)
                 except Exception as e:
-                    logger.debug(f"Could not create box plot: {e}")
+                    logger.debug("Could not create %s: %s", chart_type, e)
+                    return None
             
-            # Correlation heatmap if multiple numeric columns
-            if len(numeric_cols) > 2:
-                corr = data[numeric_cols].corr()
-                fig = go.Figure(
-                    data=go.Heatmap(
-                        z=corr.values,
-                        x=corr.columns,
-                        y=corr.index,
-                        colorscale="RdBu",
-                        zmid=0
-                    )
-                )
-                fig.update_layout(
-                    title="Correlation Matrix",
-                    xaxis_title="",
-                    yaxis_title=""
-                )
-                visualizations.append({
-                    "type": "heatmap",
-                    "title": "Correlation Matrix",
-                    "spec": fig.to_json()
-                })
+            specs = map(build, jobs) if len(jobs) < 2 else _chart_pool.map(build, jobs)
+            for (chart_type, title, _, _), spec_json in zip(jobs, specs):
+                if spec_json is not None:
+                    visualizations.append({
+                        "type": chart_type,
+                        "title": title,
+                        "spec": spec_json
+                    })
             
-            logger.info(f"Generated {len(visualizations)} visualizations")
+            logger.info("Generated %d visualizations", len(visualizations))
         
         except Exception as e:
-            logger.error(f"Error generating visualizations: {e}")
+            logger.error("Error generating visualizations: %s", e)
         
         return visualizations
     
@@ -239,37 +577,7 @@ class ResponseFormatter:
         Returns:
             List of suggested questions
         """
-        suggestions = []
-        query_type = query_result.get("query_type", "")
-        
-        follow_up_map = {
-            "summary": [
-                "Can you break this down by region?",
-                "What's the trend over time?",
-                "How does this compare to last period?"
-            ],
-            "analytical": [
-                "Which segment drove this result?",
-                "What's the growth rate?",
-                "Show me the distribution."
-            ],
-            "comparison": [
-                "What are the key differences?",
-                "Which performed better overall?",
-                "What's driving the variance?"
-            ],
-            "timeseries": [
-                "What's the forecast?",
-                "Where are the anomalies?",
-                "What caused the peaks/valleys?"
-            ]
-        }
-        
-        return follow_up_map.get(query_type, [
-            "Can you provide more details?",
-            "What's the business impact?",
-            "How does this trend?"
-        ])
+        return list(_FOLLOWUP_MAP.get(query_result.get("query_type", ""), _DEFAULT_FOLLOWUPS))
     
     def format_table_for_display(self, data: pd.DataFrame, max_rows: int = 10) -> Dict[str, Any]:
         """
@@ -283,11 +591,11 @@ class ResponseFormatter:
             Display-ready dict with data and metadata
         """
         return {
-            "data": data.head(max_rows).to_dict('records'),
+            "data": _preview_records(data, max_rows),
             "columns": data.columns.tolist(),
             "total_rows": len(data),
             "displayed_rows": min(len(data), max_rows),
-            "dtypes": data.dtypes.to_dict()
+            "dtypes": {col: str(dtype) for col, dtype in zip(data.columns, data.dtypes)}
         }
     
     def format_confidence_indicator(self, confidence: float) -> Dict[str, Any]:
@@ -321,9 +629,31 @@ class ResponseFormatter:
         }
 
 
+# Global formatter instance
+_formatter_instance = None
+
+
+def get_formatter(processor=None) -> ResponseFormatter:
+    """
+    Get or create the global ResponseFormatter instance.
+    
+    Args:
+        processor: DataProcessor to format for (defaults to the global processor)
+        
+    Returns:
+        ResponseFormatter instance (recreated only when a different processor is passed)
+    """
+    global _formatter_instance
+    if _formatter_instance is None or (processor is not None and _formatter_instance.processor is not processor):
+        _formatter_instance = ResponseFormatter(processor)
+    return _formatter_instance
+
+
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    
     # Example usage
-    formatter = ResponseFormatter()
+    formatter = get_formatter()
     
     # Create sample data
     sample_data = pd.DataFrame({